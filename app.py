@@ -1,12 +1,29 @@
-import os, json
+import os, json, time
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 
-from services.watsonx_client import build_wxa_model, correct_answer, hap_pii_detect, anti_burst_sleep
-from services.governance_eval import evaluate_governance, evaluate_governance_text
-
+# Los módulos de services/ leen su configuración del entorno al importarse:
+# el .env debe cargarse ANTES de importarlos.
 load_dotenv()
+
+from services.watsonx_client import build_wxa_model, correct_answer, hap_pii_detect, anti_burst_sleep, generation_stats
+from services.governance_eval import evaluate_governance, evaluate_governance_text, is_demo_text, score_governance_text
+from services.admission import (
+    GOV_ADMIT_MAX_INFLIGHT_EVALUATE, GOV_ADMIT_MAX_INFLIGHT_SCORE, AdmissionController, Overloaded,
+)
+from services.evaluator_pool import readiness
+from services import response as response_utils
+from services import history_store
+from services.scheduler import get_scheduler, set_request_priority
+from services.hedging import WXA_HEDGE_ENABLED, get_hedger
+
+# GOV_IMPORT_MODE=eager carga pandas + SDK al arrancar (útil con gunicorn --preload);
+# por defecto (lazy) se cargan en la primera evaluación y /health responde de inmediato.
+if (os.getenv("GOV_IMPORT_MODE") or "lazy").strip().lower() == "eager":
+    from services.governance_eval import preload as _preload_governance
+    _preload_governance()
+
 app = Flask(__name__)
 # CORS explícito para dev
 CORS(
@@ -17,9 +34,11 @@ CORS(
         "https://frontend-governance.1zcre0sjim2q.us-south.codeengine.appdomain.cloud"
     ]}},
     methods=["GET", "POST", "OPTIONS"],
-    allow_headers=["Content-Type", "Authorization"],
+    allow_headers=["Content-Type", "Authorization", "X-Priority", "X-Tenant-Id"],
     supports_credentials=False,
 )
+# JSON rápido (orjson) + compresión gzip/brotli
+response_utils.init_app(app)
 
 
 # Si alguna vista no aplica CORS por error, garantizamos los headers aquí
@@ -32,11 +51,25 @@ def add_cors_headers(resp):
         "https://frontend-governance.1zcre0sjim2q.us-south.codeengine.appdomain.cloud"
     ):
         resp.headers["Access-Control-Allow-Origin"] = origin
-        resp.headers["Vary"] = "Origin"
+        resp.vary.add("Origin")
     resp.headers["Access-Control-Allow-Methods"] = "GET,POST,OPTIONS"
-    resp.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
+    resp.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization, X-Priority, X-Tenant-Id"
     return resp
 
+# Prioridad de las llamadas salientes (watsonx.governance / watsonx.ai) por request.
+# El cliente puede fijarla con X-Priority (interactive|batch|background) o ?priority=.
+ROUTE_PRIORITY = {
+    "/api/governance/score": "interactive",
+    "/api/evaluate": "batch",
+}
+
+@app.before_request
+def set_priority():
+    default = ROUTE_PRIORITY.get(request.path, "batch")
+    prio = request.headers.get("X-Priority") or request.args.get("priority") or default
+    tenant = request.headers.get("X-Tenant-Id") or ""
+    set_request_priority(prio, tenant)
+
 # Manejo genérico de preflight
 @app.route("/api/<path:_>", methods=["OPTIONS"])
 def cors_preflight(_):
@@ -77,6 +110,35 @@ DEFAULT_QUIZ = [
 def health():
     return {"ok": True}
 
+@app.get("/ready")
+def ready():
+    """Readiness: 503 mientras el worker calienta evaluadores/modelos o si el calentamiento falló."""
+    st = readiness()
+    return jsonify(st), (200 if st["ready"] else 503)
+
+# Control de admisión: rechaza temprano (503 + Retry-After) cuando hay sobrecarga
+ADMISSION = {
+    "evaluate": AdmissionController("evaluate", GOV_ADMIT_MAX_INFLIGHT_EVALUATE),
+    "governance_score": AdmissionController("governance_score", GOV_ADMIT_MAX_INFLIGHT_SCORE),
+}
+
+@app.errorhandler(Overloaded)
+def overloaded(e: Overloaded):
+    resp = jsonify({"error": str(e), "retry_after": e.retry_after})
+    resp.status_code = 503
+    resp.headers["Retry-After"] = str(e.retry_after)
+    return resp
+
+@app.get("/api/scheduler/stats")
+def scheduler_stats():
+    data = get_scheduler().stats()
+    data["admission"] = {k: c.stats() for k, c in ADMISSION.items()}
+    data["generation"] = generation_stats()
+    if WXA_HEDGE_ENABLED:
+        # calls / hedges / hedge_wins / hedge_ratio: verifica el presupuesto (WXA_HEDGE_BUDGET)
+        data["hedging"] = get_hedger().stats()
+    return jsonify(data)
+
 @app.post("/api/evaluate")
 def evaluate():
     """
@@ -86,8 +148,13 @@ def evaluate():
       "answers": ["...", "..."],
       "context": "...",
       "system_prompt": "...",
-      "normalize_answers": true
+      "normalize_answers": true,
+      "fields": "verdict,hap,faithfulness",   # opcional: modo compacto con proyección
+      "compact": true,                        # opcional: omite wx_raw
+      "debug": false,                         # opcional: conserva wx_raw (truncado)
+      "quiz_id": "..."                        # opcional: id para el historial (por defecto hash del quiz)
     }
+    (fields/compact/debug también se aceptan como query string)
     """
     data = request.get_json(force=True) or {}
     quiz = data.get("quiz") or DEFAULT_QUIZ
@@ -96,6 +163,25 @@ def evaluate():
     system_prompt = data.get("system_prompt") or "Eres un asistente útil y seguro. Responde con precisión y sin divulgar datos sensibles."
     normalize = bool(data.get("normalize_answers", True))
 
+    opts = response_utils.response_options(data)
+
+    # La latencia escala con el número de preguntas: es la unidad de trabajo
+    with ADMISSION["evaluate"].admit(units=len(quiz)):
+        results = _evaluate(quiz, answers, context, system_prompt, normalize)
+
+    history_store.record(
+        "evaluate", results,
+        quiz_id=str(data.get("quiz_id") or history_store.quiz_id_for(quiz)),
+        questions=[q.get("question", "") for q in quiz],
+        answers=[str(a or "") for a in answers],
+    )
+
+    if opts["compact"]:
+        results = response_utils.compact_rows(results, opts["fields"], opts["debug"])
+    return jsonify({"results": results})
+
+def _evaluate(quiz, answers, context, system_prompt, normalize):
+    """Trabajo de /api/evaluate una vez admitida la petición."""
     # 1) Governance metrics
     metrics_rows = evaluate_governance(quiz, answers, context, system_prompt, normalize_answers=normalize)
 
@@ -116,7 +202,7 @@ def evaluate():
             anti_burst_sleep()
         results.append(row)
 
-    return jsonify({"results": results})
+    return results
 
 @app.get("/api/default_exercise")
 def default_exercise():
@@ -132,6 +218,49 @@ def default_exercise():
 
 
 
+@app.get("/api/history/stats")
+def history_stats():
+    """
+    Estadísticas del historial de evaluaciones (sin recalcular métricas).
+    Query: metric, quiz_id, question, answer (hash), since/until (YYYY-MM-DD) o days=N,
+           group_by (question|quiz|metric|day|answer), order_by (avg|n|high_rate|max|min),
+           asc=1, limit.
+    Ej.: ?metric=faithfulness&days=7  |  ?metric=jailbreak&group_by=answer&order_by=high_rate&limit=10
+    """
+    store = history_store.get_store()
+    if store is None:
+        return jsonify({"error": "historial deshabilitado (GOV_HISTORY_DB)"}), 404
+    args = request.args
+    try:
+        since = _history_date(args, "since")
+        until = _history_date(args, "until")
+        if not since and args.get("days"):
+            days = int(args["days"]) if args["days"].isdigit() else 0
+            if days < 1:
+                raise ValueError("days debe ser un entero >= 1")
+            since = time.strftime("%Y-%m-%d", time.gmtime(time.time() - 86400 * (days - 1)))
+        rows = store.stats(
+            metric=args.get("metric"), quiz_id=args.get("quiz_id"), question=args.get("question"),
+            answer=args.get("answer"),
+            since=since, until=until,
+            group_by=args.get("group_by", "question"), order_by=args.get("order_by", "avg"),
+            ascending=args.get("asc") == "1", limit=int(args.get("limit", 50)),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"stats": rows})
+
+def _history_date(args, name):
+    """Valida un filtro de fecha YYYY-MM-DD (ValueError si no calza)."""
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        time.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"{name} debe tener formato YYYY-MM-DD") from None
+    return value
+
 @app.post("/api/governance/score")
 def governance_score():
     """
@@ -144,7 +273,15 @@ def governance_score():
         if not text:
             return jsonify({"error": "text requerido"}), 400
 
-        scores = evaluate_governance_text(text)  # dict con claves de métricas
+        # Los ejemplos DEMO son baratos: nunca se rechazan por sobrecarga
+        if is_demo_text(text):
+            scores = evaluate_governance_text(text)
+        else:
+            with ADMISSION["governance_score"].admit():
+                scores, measured = score_governance_text(text)  # dict con claves de métricas
+            # Al historial solo van las métricas calculadas (no los 0.0 de relleno/fallback)
+            if measured:
+                history_store.record("score", [measured], answers=[text])
         # Aseguramos 0..1 y solo numéricos
         clean = {}
         for k, v in (scores or {}).items():
@@ -156,6 +293,8 @@ def governance_score():
             except Exception:
                 pass
         return jsonify(clean)
+    except Overloaded:
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
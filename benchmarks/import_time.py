@@ -0,0 +1,92 @@
+# benchmarks/import_time.py
+# Informe de tiempo de import (equivalente a `python -X importtime`) para
+# detectar regresiones de arranque de los workers.
+#
+# Uso:
+#   python benchmarks/import_time.py                      # import app
+#   python benchmarks/import_time.py --module services.governance_eval --top 15
+#   python benchmarks/import_time.py --budget-ms 1500     # exit 1 si se supera
+#   python benchmarks/import_time.py --forbid pandas --forbid ibm_watsonx_gov
+
+from __future__ import annotations
+import argparse
+import os
+import re
+import subprocess
+import sys
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def measure(module: str) -> List[Tuple[str, int, int, int]]:
+    """
+    Importa `module` en un intérprete limpio con -X importtime.
+    Devuelve [(modulo, self_us, cumulative_us, profundidad)] en orden de carga.
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} falló:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if m:
+            self_us, cum_us, indent, name = m.groups()
+            rows.append((name, int(self_us), int(cum_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def report(module: str, top: int = 20) -> Dict[str, object]:
+    rows = measure(module)
+    by_name = {name: cum for name, _, cum, _ in rows}
+    total = by_name.get(module, max((cum for _, _, cum, _ in rows), default=0))
+    # Imports directos del módulo medido (profundidad 1), por tiempo acumulado
+    direct = sorted((r for r in rows if r[3] == 1), key=lambda r: r[2], reverse=True)
+    heaviest = sorted(rows, key=lambda r: r[1], reverse=True)
+    return {
+        "module": module,
+        "total_ms": total / 1000.0,
+        "modules_loaded": len(rows),
+        "top": [(name, cum / 1000.0) for name, _, cum, _ in direct[:top]],
+        "self_top": [(name, s / 1000.0) for name, s, _, _ in heaviest[:top]],
+        "loaded": set(by_name),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Tiempo de import de la app (regresiones de arranque)")
+    p.add_argument("--module", default="app")
+    p.add_argument("--top", type=int, default=20)
+    p.add_argument("--budget-ms", type=float, default=None, help="Falla si el import total supera este valor")
+    p.add_argument("--forbid", action="append", default=[],
+                   help="Paquete que NO debe cargarse al importar (repetible)")
+    args = p.parse_args(argv)
+
+    rep = report(args.module, args.top)
+    print(f"import {rep['module']}: {rep['total_ms']:.1f} ms, {rep['modules_loaded']} módulos")
+    print(f"{'cumulative ms':>14}  import directo")
+    for name, ms in rep["top"]:
+        print(f"{ms:>14.1f}  {name}")
+    print(f"{'self ms':>14}  módulo")
+    for name, ms in rep["self_top"]:
+        print(f"{ms:>14.1f}  {name}")
+
+    failed = False
+    if args.budget_ms is not None and rep["total_ms"] > args.budget_ms:
+        print(f"FALLA: {rep['total_ms']:.1f} ms > presupuesto {args.budget_ms:.1f} ms")
+        failed = True
+    for pkg in args.forbid:
+        if pkg in rep["loaded"]:
+            print(f"FALLA: '{pkg}' se importa al cargar {args.module} (debería ser diferido)")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
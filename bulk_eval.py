@@ -0,0 +1,350 @@
+# bulk_eval.py
+# Evaluación masiva offline (auditorías) sobre datasets JSONL / CSV / Parquet.
+#
+# Cada registro: {"question", "ideal_answer", "user_answer", "context", ["system_prompt"], ["id"]}
+# - Lee la entrada en streaming, por bloques de tamaño fijo (memoria acotada).
+# - Procesa los bloques en paralelo con un pool de procesos.
+# - Escribe resultados incrementalmente (JSONL o Parquet por segmentos).
+# - Guarda un checkpoint tras cada bloque: una corrida interrumpida se reanuda.
+#
+# Uso:
+#   python bulk_eval.py entrada.jsonl salida.jsonl
+#   python bulk_eval.py entrada.parquet salida_dir --output-format parquet --jobs 4
+#   python bulk_eval.py entrada.csv salida.jsonl --no-correct --chunk-size 200
+#   python bulk_eval.py muestra.jsonl calibracion.json --calibrate --calibrate-limit 500
+
+from __future__ import annotations
+import argparse
+import csv
+import glob
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+DEFAULT_SYSTEM_PROMPT = "Eres un asistente útil y seguro. Responde con precisión y sin divulgar datos sensibles."
+
+
+# -----------------------------
+# Lectura en streaming
+# -----------------------------
+def _detect_format(path: str, explicit: Optional[str]) -> str:
+    if explicit:
+        return explicit
+    ext = os.path.splitext(path)[1].lower()
+    return {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv", ".parquet": "parquet"}.get(ext, "jsonl")
+
+
+def iter_records(path: str, fmt: str, batch_size: int = 1024) -> Iterator[Dict[str, Any]]:
+    """Itera los registros de entrada sin cargar el archivo completo."""
+    if fmt == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    elif fmt == "csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            yield from csv.DictReader(f)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq  # solo para Parquet (verificado en run())
+        pf = pq.ParquetFile(path)
+        for batch in pf.iter_batches(batch_size=batch_size):
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Formato de entrada no soportado: {fmt}")
+
+
+def iter_chunks(records: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# -----------------------------
+# Trabajo por bloque (en el proceso hijo)
+# -----------------------------
+_MODEL: Tuple[Optional[object], Optional[str]] | None = None
+
+
+def _init_worker() -> None:
+    load_dotenv()
+    from services.scheduler import set_request_priority
+    set_request_priority("background")
+
+
+def _process_chunk(start: int, records: List[Dict[str, Any]], opts: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Evalúa un bloque. Agrupa los registros por (context, system_prompt) para
+    llamar a evaluate_governance una vez por grupo.
+    """
+    global _MODEL
+    from services.governance_eval import evaluate_governance
+    from services.watsonx_client import anti_burst_sleep, build_wxa_model, correct_answer
+
+    groups: Dict[Tuple[str, str], List[int]] = {}
+    for i, r in enumerate(records):
+        key = (str(r.get("context") or ""), str(r.get("system_prompt") or opts["system_prompt"]))
+        groups.setdefault(key, []).append(i)
+
+    out: List[Dict[str, Any]] = [{} for _ in records]
+    for (context, system_prompt), idxs in groups.items():
+        quiz = [{"question": str(records[i].get("question") or ""),
+                 "ideal_answer": str(records[i].get("ideal_answer") or "")} for i in idxs]
+        answers = [str(records[i].get("user_answer") or "") for i in idxs]
+        try:
+            rows = evaluate_governance(quiz, answers, context, system_prompt,
+                                       normalize_answers=opts["normalize"])
+        except Exception as e:
+            rows = [{"error": f"evaluate_governance: {e}"} for _ in idxs]
+        for j, i in enumerate(idxs):
+            out[i].update(rows[j] if j < len(rows) else {})
+
+        if opts["correct"]:
+            if _MODEL is None:
+                _MODEL = build_wxa_model()
+            model, err = _MODEL
+            for j, i in enumerate(idxs):
+                if err:
+                    out[i].update({"wx_verdict": None, "wx_explanation": None,
+                                   "wx_improved_answer": None, "wx_raw": err})
+                    continue
+                out[i].update(correct_answer(model, quiz[j]["question"], answers[j], context, system_prompt))
+                anti_burst_sleep()
+
+    for i, r in enumerate(records):
+        out[i] = {"index": start + i, "id": r.get("id"), "question": r.get("question"), **out[i]}
+    return out
+
+
+# -----------------------------
+# Escritura incremental + checkpoint
+# -----------------------------
+class _Checkpoint:
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Dict[str, Any]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, state: Dict[str, Any]) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)  # atómico
+
+
+class _JsonlWriter:
+    def __init__(self, path: str, resume_bytes: int):
+        mode = "r+b" if resume_bytes and os.path.exists(path) else "wb"
+        self.f = open(path, mode)
+        # Descarta lo escrito después del último checkpoint (bloque a medias)
+        self.f.seek(resume_bytes if mode == "r+b" else 0)
+        self.f.truncate()
+
+    def write(self, chunk_idx: int, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        for r in rows:
+            self.f.write((json.dumps(r, ensure_ascii=False, default=str) + "\n").encode("utf-8"))
+        self.f.flush()
+        os.fsync(self.f.fileno())
+        return {"output_bytes": self.f.tell()}
+
+    def close(self) -> None:
+        self.f.close()
+
+
+class _ParquetWriter:
+    """Un segmento part-NNNNNN.parquet por bloque dentro del directorio de salida."""
+
+    def __init__(self, path: str, next_chunk: int):
+        import pandas as pd  # noqa: F401  (requerido para to_parquet)
+        self.dir = path
+        os.makedirs(path, exist_ok=True)
+        for part in glob.glob(os.path.join(path, "part-*.parquet")):
+            n = int(os.path.basename(part)[5:11])
+            if n >= next_chunk:
+                os.remove(part)
+
+    def write(self, chunk_idx: int, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        import pandas as pd
+        final = os.path.join(self.dir, f"part-{chunk_idx:06d}.parquet")
+        tmp = final + ".tmp"
+        pd.DataFrame(rows).to_parquet(tmp, index=False)
+        os.replace(tmp, final)
+        return {}
+
+    def close(self) -> None:
+        pass
+
+
+# -----------------------------
+# Orquestación
+# -----------------------------
+def _parquet_ok(*fmts: str) -> bool:
+    if "parquet" in fmts and importlib.util.find_spec("pyarrow") is None:
+        print("Parquet requiere pyarrow: pip install pyarrow (o usa JSONL/CSV).", file=sys.stderr)
+        return False
+    return True
+
+
+def calibrate(args: argparse.Namespace) -> int:
+    """
+    Compara el backend local de métricas con el SDK sobre una muestra de la
+    entrada (las primeras --calibrate-limit filas) y escribe el informe JSON
+    en `output` (ver governance_eval.calibrate_local_metrics).
+    """
+    in_fmt = _detect_format(args.input, args.input_format)
+    if not _parquet_ok(in_fmt):
+        return 2
+    _init_worker()
+    from services.governance_eval import calibration_values
+    from services.local_metrics import compare
+
+    records = list(islice(iter_records(args.input, in_fmt), max(1, args.calibrate_limit)))
+    groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+    for r in records:
+        key = (str(r.get("context") or ""), str(r.get("system_prompt") or args.system_prompt))
+        groups.setdefault(key, []).append(r)
+
+    local: Dict[str, List[Optional[float]]] = {}
+    sdk: Dict[str, List[Optional[float]]] = {}
+    n_rows = 0
+    for (context, system_prompt), rows in groups.items():
+        quiz = [{"question": str(r.get("question") or ""), "ideal_answer": str(r.get("ideal_answer") or "")}
+                for r in rows]
+        answers = [str(r.get("user_answer") or "") for r in rows]
+        lv, sv = calibration_values(quiz, answers, context, system_prompt,
+                                    normalize_answers=not args.no_normalize)
+        # Alineado por fila: una métrica ausente en un grupo aporta None en sus filas
+        for dst, src in ((local, lv), (sdk, sv)):
+            for key in set(dst) | set(src):
+                dst.setdefault(key, [None] * n_rows).extend(src.get(key) or [None] * len(rows))
+        n_rows += len(rows)
+
+    report = {"records": len(records), "groups": len(groups), "metrics": compare(local, sdk)}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0
+
+
+def run(args: argparse.Namespace) -> int:
+    in_fmt = _detect_format(args.input, args.input_format)
+    out_fmt = args.output_format or ("parquet" if args.output.endswith(".parquet") or os.path.isdir(args.output) else "jsonl")
+    if not _parquet_ok(in_fmt, out_fmt):
+        return 2
+    ckpt = _Checkpoint(args.checkpoint or (args.output.rstrip("/\\") + ".ckpt.json"))
+
+    state = ckpt.load() if not args.restart else {}
+    if state and (state.get("input") != os.path.abspath(args.input) or state.get("chunk_size") != args.chunk_size):
+        print("Checkpoint no corresponde a esta entrada/chunk-size; usa --restart.", file=sys.stderr)
+        return 2
+    next_chunk = int(state.get("next_chunk", 0))
+    state.update({"input": os.path.abspath(args.input), "chunk_size": args.chunk_size, "next_chunk": next_chunk})
+
+    writer = (_ParquetWriter(args.output, next_chunk) if out_fmt == "parquet"
+              else _JsonlWriter(args.output, int(state.get("output_bytes", 0))))
+    opts = {"system_prompt": args.system_prompt, "normalize": not args.no_normalize, "correct": not args.no_correct}
+
+    chunks = enumerate(iter_chunks(iter_records(args.input, in_fmt, args.chunk_size), args.chunk_size))
+    # Salta los bloques ya procesados (se leen pero no se evalúan)
+    for _ in islice(chunks, next_chunk):
+        pass
+    if next_chunk:
+        print(f"Reanudando desde el bloque {next_chunk} ({next_chunk * args.chunk_size} registros).")
+
+    history = None
+    if args.history:
+        from services.history_store import get_store
+        history = get_store()
+    quiz_id = args.quiz_id or os.path.basename(args.input)
+
+    max_pending = max(1, args.jobs) * 2  # acota la memoria: pocos bloques en vuelo
+    pending: Dict[Any, int] = {}
+    done_results: Dict[int, List[Dict[str, Any]]] = {}
+    chunk_answers: Dict[int, List[str]] = {}  # textos evaluados por bloque (solo con --history)
+    total = 0
+    t0 = time.monotonic()
+
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs), initializer=_init_worker) as pool:
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) + len(done_results) < max_pending:
+                nxt = next(chunks, None)
+                if nxt is None:
+                    exhausted = True
+                    break
+                idx, records = nxt
+                if history is not None:
+                    chunk_answers[idx] = [str(r.get("user_answer") or "") for r in records]
+                pending[pool.submit(_process_chunk, idx * args.chunk_size, records, opts)] = idx
+            if not pending and not done_results:
+                break
+            if pending:
+                finished, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    done_results[pending.pop(fut)] = fut.result()
+            # Escribimos en orden para que el checkpoint sea un simple contador
+            while state["next_chunk"] in done_results:
+                idx = state["next_chunk"]
+                rows = done_results.pop(idx)
+                state.update(writer.write(idx, rows))
+                state["next_chunk"] = idx + 1
+                ckpt.save(state)
+                if history is not None:
+                    history.record("bulk", rows, quiz_id=quiz_id,
+                                   questions=[str(r.get("question") or "") for r in rows],
+                                   answers=chunk_answers.pop(idx, None))
+                total += len(rows)
+                rate = total / max(1e-9, time.monotonic() - t0)
+                print(f"bloque {idx} listo ({len(rows)} registros, {rate:.1f} reg/s)")
+
+    writer.close()
+    if history is not None:
+        history.flush()
+    print(f"Completado: {total} registros nuevos, {state['next_chunk']} bloques en total.")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Evaluación masiva con watsonx.governance / watsonx.ai")
+    p.add_argument("input", help="Archivo de entrada (.jsonl, .csv o .parquet)")
+    p.add_argument("output", help="Salida: archivo .jsonl o directorio de segmentos Parquet")
+    p.add_argument("--input-format", choices=["jsonl", "csv", "parquet"])
+    p.add_argument("--output-format", choices=["jsonl", "parquet"])
+    p.add_argument("--chunk-size", type=int, default=100)
+    p.add_argument("--jobs", type=int, default=2, help="Procesos en paralelo")
+    p.add_argument("--checkpoint", help="Ruta del checkpoint (por defecto <output>.ckpt.json)")
+    p.add_argument("--restart", action="store_true", help="Ignora el checkpoint y empieza de cero")
+    p.add_argument("--system-prompt", default=DEFAULT_SYSTEM_PROMPT)
+    p.add_argument("--no-normalize", action="store_true", help="No normaliza respuestas para similaridad")
+    p.add_argument("--no-correct", action="store_true", help="Omite la corrección con watsonx.ai")
+    p.add_argument("--history", action="store_true", help="Registra los resultados en el historial (GOV_HISTORY_DB)")
+    p.add_argument("--quiz-id", help="quiz_id para el historial (por defecto el nombre del archivo)")
+    p.add_argument("--calibrate", action="store_true",
+                   help="No evalúa: compara métricas locales vs SDK y escribe el informe JSON en output")
+    p.add_argument("--calibrate-limit", type=int, default=500, help="Filas de la muestra para --calibrate")
+    args = p.parse_args(argv)
+    if args.chunk_size < 1:
+        p.error("--chunk-size debe ser >= 1")
+    if args.calibrate:
+        return calibrate(args)
+    return run(args)
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    sys.exit(main())
@@ -0,0 +1,36 @@
+# gunicorn.conf.py
+# Gunicorn lo lee automáticamente desde el directorio de trabajo.
+# Cada worker calienta su pool de evaluadores en post_worker_init, de forma
+# síncrona: el worker no entra a su bucle de accept() hasta terminar, así que
+# ningún request cae en un worker frío. Como todo worker que responde ya está
+# caliente, /ready refleja el estado de todos; /health responde siempre.
+# Con --preload la app (y sus imports) se cargan una vez en el master y
+# los workers los heredan por fork; el calentamiento igual ocurre por worker.
+
+import os
+
+# gthread con varios hilos por worker: así un /api/governance/score interactivo
+# comparte proceso con un /api/evaluate masivo y el planificador de prioridades
+# (services/scheduler.py, por proceso) puede adelantarlo. Con 1 hilo (default
+# de gunicorn) cada worker atiende un request a la vez y no hay nada que ordenar.
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS") or "8")
+
+# El worker no envía heartbeat al master mientras calienta: el timeout debe
+# cubrir el calentamiento (carga de modelos locales) o el master lo reinicia.
+timeout = int(os.getenv("GUNICORN_TIMEOUT") or "120")
+
+
+def post_worker_init(worker):
+    from services.evaluator_pool import GOV_WARMUP, warm_up
+
+    if not GOV_WARMUP:
+        return
+    worker.log.info("Worker %s: calentando evaluadores de watsonx.governance", worker.pid)
+    st = warm_up()
+    if st["error"]:
+        # Sigue atendiendo (rutas con fallback) pero /ready responde 503
+        worker.log.warning("Worker %s: calentamiento fallido en %ss (degraded): %s",
+                           worker.pid, st["seconds"], st["error"])
+    else:
+        worker.log.info("Worker %s: listo en %ss", worker.pid, st["seconds"])
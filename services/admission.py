@@ -0,0 +1,118 @@
+# services/admission.py
+# Control de admisión y "load shedding" para las rutas caras.
+# En lugar de dejar que las peticiones se acumulen detrás de los workers
+# gthread hasta que el cliente expire (gastando cuota upstream en trabajo que
+# nadie leerá), se rechaza temprano con 503 + Retry-After calculado.
+
+from __future__ import annotations
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+# Los límites son POR WORKER y se dimensionan con los hilos de gunicorn
+# (gunicorn.conf.py). Las rutas caras, sumadas, dejan al menos un hilo libre:
+# así una petición nueva siempre llega a admit() y se rechaza en microsegundos,
+# en vez de esperar detrás de los hilos ocupados hasta que el cliente expire.
+GUNICORN_THREADS = int(os.getenv("GUNICORN_THREADS") or "8")
+
+GOV_ADMIT_MAX_INFLIGHT_EVALUATE = int(os.getenv("GOV_ADMIT_MAX_INFLIGHT_EVALUATE") or max(1, GUNICORN_THREADS // 2))
+GOV_ADMIT_MAX_INFLIGHT_SCORE    = int(os.getenv("GOV_ADMIT_MAX_INFLIGHT_SCORE")
+                                      or max(1, GUNICORN_THREADS - GUNICORN_THREADS // 2 - 1))
+# Paralelismo real de servicio: slots upstream del planificador (services/scheduler.py)
+GOV_ADMIT_CAPACITY     = int(os.getenv("GOV_ADMIT_CAPACITY") or os.getenv("GOV_SCHED_SLOTS") or "4")
+GOV_ADMIT_MAX_WAIT_S   = float(os.getenv("GOV_ADMIT_MAX_WAIT_S") or "20")  # espera estimada máxima
+GOV_ADMIT_EWMA_ALPHA   = 0.2
+
+
+class Overloaded(Exception):
+    """Se lanza cuando una petición se rechaza por sobrecarga."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name}: servicio sobrecargado, reintenta en {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Lleva la cuenta de peticiones en vuelo (y de sus unidades de trabajo, p. ej.
+    preguntas del quiz) y una media móvil (EWMA) de la latencia POR UNIDAD, para
+    que un quiz grande no fije la estimación de todos los demás.
+    - Si en_vuelo >= max_inflight, se rechaza.
+    - Si en_vuelo < capacidad, se admite siempre: la petición no haría cola.
+    - Si no, la espera estimada es (unidades_en_vuelo / capacidad) * latencia_por_unidad
+      y se rechaza si supera max_wait_s.
+    Así una latencia alta nunca deja la ruta rechazando con el worker ocioso.
+    """
+
+    def __init__(self, name: str, max_inflight: int, capacity: int = GOV_ADMIT_CAPACITY,
+                 max_wait_s: float = GOV_ADMIT_MAX_WAIT_S):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self.max_inflight = max(1, max_inflight)
+        self.max_wait_s = max(0.0, max_wait_s)
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._inflight_units = 0
+        self._ewma: float | None = None  # segundos por unidad
+        self._admitted = 0
+        self._shed = 0
+
+    def estimated_wait(self) -> float:
+        with self._lock:
+            return self._estimated_wait_locked()
+
+    def _estimated_wait_locked(self) -> float:
+        # Sin cola (hay capacidad libre) no hay espera, sea cual sea la latencia
+        if self._ewma is None or self._inflight < self.capacity:
+            return 0.0
+        return (self._inflight_units / self.capacity) * self._ewma
+
+    def _retry_after_locked(self) -> int:
+        # Tiempo hasta que se libere al menos un "turno" de capacidad
+        wait = self._estimated_wait_locked()
+        if wait <= 0.0:
+            wait = self._ewma if self._ewma is not None else 1.0
+        return max(1, int(math.ceil(wait)))
+
+    @contextmanager
+    def admit(self, units: int = 1) -> Iterator[None]:
+        """
+        Admite la petición (de `units` unidades de trabajo) o lanza Overloaded.
+        Registra la latencia por unidad al salir.
+        """
+        units = max(1, int(units))
+        with self._lock:
+            if self._inflight >= self.max_inflight or self._estimated_wait_locked() > self.max_wait_s:
+                self._shed += 1
+                raise Overloaded(self.name, self._retry_after_locked())
+            self._inflight += 1
+            self._inflight_units += units
+            self._admitted += 1
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            per_unit = (time.monotonic() - t0) / units
+            with self._lock:
+                self._inflight -= 1
+                self._inflight_units -= units
+                self._ewma = per_unit if self._ewma is None else (
+                    GOV_ADMIT_EWMA_ALPHA * per_unit + (1 - GOV_ADMIT_EWMA_ALPHA) * self._ewma
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "inflight": self._inflight,
+                "inflight_units": self._inflight_units,
+                "capacity": self.capacity,
+                "max_inflight": self.max_inflight,
+                "latency_per_unit_ewma_s": round(self._ewma, 3) if self._ewma is not None else None,
+                "estimated_wait_s": round(self._estimated_wait_locked(), 3),
+                "admitted": self._admitted,
+                "shed": self._shed,
+            }
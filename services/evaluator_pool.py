@@ -0,0 +1,151 @@
+# services/evaluator_pool.py
+# Pool de MetricsEvaluator ya inicializados + caché de instancias de métricas.
+# Evita crear evaluadores/métricas en cada request y permite "calentar" el
+# worker (carga de modelos/tokenizers locales de HAP, PII, similaridad…)
+# antes de recibir tráfico (post_worker_init en gunicorn.conf.py). El estado de
+# calentamiento se expone como readiness, separado de /health.
+
+from __future__ import annotations
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+GOV_EVALUATOR_POOL_SIZE = int(os.getenv("GOV_EVALUATOR_POOL_SIZE") or "4")
+GOV_WARMUP              = (os.getenv("GOV_WARMUP") or "1").strip() == "1"
+GOV_METRIC_CACHE_SIZE   = int(os.getenv("GOV_METRIC_CACHE_SIZE") or "64")
+
+
+class EvaluatorPool:
+    """
+    Pool acotado de evaluadores. Cada llamada concurrente toma uno propio
+    (no asumimos que MetricsEvaluator sea thread-safe) y lo devuelve al terminar.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = GOV_EVALUATOR_POOL_SIZE):
+        self._factory = factory
+        self._size = max(1, size)
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create(self) -> Any:
+        """Llama a la fábrica; si falla, libera el cupo reservado en _created."""
+        try:
+            return self._factory()
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def prefill(self) -> None:
+        """Crea todos los evaluadores por adelantado."""
+        items = []
+        try:
+            while True:
+                with self._lock:
+                    if self._created >= self._size:
+                        break
+                    self._created += 1
+                items.append(self._create())
+        finally:
+            # Los ya construidos quedan en el pool aunque uno posterior falle
+            for it in items:
+                self._idle.put(it)
+
+    @contextmanager
+    def evaluator(self) -> Iterator[Any]:
+        try:
+            ev = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self._size
+                if create:
+                    self._created += 1
+            ev = self._create() if create else self._idle.get()
+        try:
+            yield ev
+        finally:
+            self._idle.put(ev)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": self._size, "created": self._created, "idle": self._idle.qsize()}
+
+
+# -----------------------------
+# Caché de instancias de métricas
+# -----------------------------
+# LRU acotada: los parámetros incluyen el system_prompt que manda el cliente,
+# así que las claves posibles no están acotadas.
+_METRICS: "OrderedDict[Tuple[Any, Tuple[Tuple[str, Any], ...]], Any]" = OrderedDict()
+_METRICS_LOCK = threading.Lock()
+
+
+def metric_instance(cls: Any, **kwargs) -> Any:
+    """Devuelve una instancia reutilizable de la métrica `cls` con esos parámetros."""
+    key = (cls, tuple(sorted(kwargs.items())))
+    with _METRICS_LOCK:
+        inst = _METRICS.get(key)
+        if inst is not None:
+            _METRICS.move_to_end(key)
+            return inst
+    inst = cls(**kwargs)
+    with _METRICS_LOCK:
+        inst = _METRICS.setdefault(key, inst)
+        _METRICS.move_to_end(key)
+        while len(_METRICS) > max(1, GOV_METRIC_CACHE_SIZE):
+            _METRICS.popitem(last=False)
+    return inst
+
+
+# -----------------------------
+# Calentamiento + readiness
+# -----------------------------
+_STATE: Dict[str, Any] = {"status": "idle", "error": None, "started": None, "seconds": None}
+_STATE_LOCK = threading.Lock()
+
+_WARMUP_QUIZ = [{"question": "¿Cuál es la capital de Chile?", "ideal_answer": "Santiago."}]
+_WARMUP_ANSWERS = ["Santiago de Chile."]
+_WARMUP_CONTEXT = "Santiago es la capital de Chile."
+
+
+def warm_up() -> Dict[str, Any]:
+    """
+    Construye el pool y ejecuta todas las métricas sobre un dataset sintético
+    mínimo, para que los modelos locales queden cargados en este proceso.
+    Es síncrono (se llama desde post_worker_init); devuelve el estado final:
+    "ready" si terminó bien, "degraded" si falló (puede reintentarse).
+    """
+    from services import governance_eval
+
+    with _STATE_LOCK:
+        if _STATE["status"] not in ("idle", "degraded"):
+            return dict(_STATE)
+        _STATE.update(status="warming", error=None, started=time.time())
+    t0 = time.monotonic()
+    try:
+        governance_eval.get_evaluator_pool().prefill()
+        governance_eval.evaluate_governance(_WARMUP_QUIZ, _WARMUP_ANSWERS, _WARMUP_CONTEXT, "")
+        governance_eval.evaluate_governance_text(_WARMUP_ANSWERS[0])
+        err = None
+    except Exception as e:  # el worker igual atiende (rutas con fallback), pero no está listo
+        err = str(e)
+    with _STATE_LOCK:
+        _STATE.update(status="degraded" if err else "ready", error=err,
+                      seconds=round(time.monotonic() - t0, 2))
+        return dict(_STATE)
+
+
+def readiness() -> Dict[str, Any]:
+    """
+    ready=False mientras hay un calentamiento en curso (p. ej. si se llama a
+    warm_up() desde un hilo propio fuera de gunicorn) o si falló ("degraded").
+    Si nunca se pidió calentamiento (p. ej. `python app.py`), el proceso está listo.
+    """
+    with _STATE_LOCK:
+        st = dict(_STATE)
+    st["ready"] = st["status"] in ("idle", "ready")
+    return st
@@ -1,18 +1,20 @@
 # services/governance_eval.py
 # Evaluación de respuestas usando watsonx.governance
 # Requiere: ibm-watsonx-gov, pandas, (y dependencias opcionales como unitxt, scikit-learn, textstat)
+#
+# pandas y el SDK son imports pesados (varios segundos): se cargan recién en
+# la primera evaluación (ver _sdk/preload), no al importar este módulo.
 
 from __future__ import annotations
 import re
+import threading
 import unicodedata
 from importlib import import_module
-from typing import Any, Dict, List, Optional
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-import pandas as pd
-
-# SDK watsonx.governance (asegúrate de tenerlo instalado)
-from ibm_watsonx_gov.evaluators.metrics_evaluator import MetricsEvaluator
-from ibm_watsonx_gov.metrics import AnswerSimilarityMetric
+from services.evaluator_pool import EvaluatorPool, metric_instance
+from services.scheduler import scheduled
 
 import logging
 
@@ -20,6 +22,115 @@ import logging
 import json
 import os, pprint
 
+if TYPE_CHECKING:
+    import pandas as pd
+
+LOGGER = logging.getLogger(__name__)
+
+# -----------------------------
+# Carga diferida del SDK
+# -----------------------------
+# OJO: los imports concretos pueden variar según versión del SDK.
+_SDK_METRIC_NAMES = (
+    "UnethicalBehaviorMetric",
+    "JailbreakMetric",
+    "SocialBiasMetric",
+    "ProfanityMetric",
+    "HarmMetric",
+    "HarmEngagementMetric",
+    "SexualContentMetric",
+    "ViolenceMetric",
+    "EvasivenessMetric",
+    "AnswerRelevanceMetric",
+    "FaithfulnessMetric",
+    "TopicRelevanceMetric",
+    "ContextRelevanceMetric",
+    "AnswerSimilarityMetric",
+    # "PromptSafetyRiskMetric",  # si la tienes disponible en tu SDK
+)
+
+_SDK: Optional[SimpleNamespace] = None
+_SDK_ERROR: Optional[str] = None
+_SDK_LOCK = threading.Lock()
+
+
+def _load_sdk() -> SimpleNamespace:
+    # Núcleo obligatorio: pandas + MetricsEvaluator
+    import pandas as pd
+    from ibm_watsonx_gov.evaluators.metrics_evaluator import MetricsEvaluator
+
+    # Clases de métricas opcionales: las que falten quedan en None
+    try:
+        metrics_mod = import_module("ibm_watsonx_gov.metrics")
+    except Exception as e:
+        LOGGER.warning("ibm_watsonx_gov.metrics no importable: %s", e)
+        metrics_mod = None
+    classes = {n: getattr(metrics_mod, n, None) for n in _SDK_METRIC_NAMES}
+    missing = [n for n, c in classes.items() if c is None]
+    if missing:
+        LOGGER.warning("Métricas no disponibles en este SDK: %s", ", ".join(missing))
+    return SimpleNamespace(pd=pd, MetricsEvaluator=MetricsEvaluator, **classes)
+
+
+def _sdk() -> SimpleNamespace:
+    """
+    Importa pandas + watsonx.governance la primera vez y los cachea.
+    Devuelve un namespace con `pd`, `MetricsEvaluator` y las clases de métricas
+    (None las que el SDK instalado no tenga).
+    Lanza RuntimeError si falta el núcleo; el fallo también se cachea para no
+    reintentar el import en cada llamada.
+    """
+    global _SDK, _SDK_ERROR
+    if _SDK is None:
+        with _SDK_LOCK:
+            if _SDK is None and _SDK_ERROR is None:
+                try:
+                    _SDK = _load_sdk()
+                except Exception as e:
+                    _SDK_ERROR = str(e)
+                    LOGGER.warning("watsonx.governance SDK no disponible o no importable: %s", e)
+            if _SDK is None:
+                raise RuntimeError(f"SDK de watsonx.governance no disponible: {_SDK_ERROR}")
+    return _SDK
+
+
+def sdk_available() -> bool:
+    try:
+        _sdk()
+        return True
+    except RuntimeError:
+        return False
+
+
+def preload() -> bool:
+    """Carga eager de pandas, el SDK y el backend local (GOV_IMPORT_MODE=eager)."""
+    import services.local_metrics  # noqa: F401  (numpy / scikit-learn)
+    return sdk_available()
+
+
+# -----------------------------
+# Pool de evaluadores
+# -----------------------------
+_EVALUATOR_POOL: Optional[EvaluatorPool] = None
+_EVALUATOR_POOL_LOCK = threading.Lock()
+
+
+def get_evaluator_pool() -> EvaluatorPool:
+    """Pool de MetricsEvaluator compartido por el proceso (se crea al primer uso)."""
+    global _EVALUATOR_POOL
+    if _EVALUATOR_POOL is None:
+        with _EVALUATOR_POOL_LOCK:
+            if _EVALUATOR_POOL is None:
+                _EVALUATOR_POOL = EvaluatorPool(_sdk().MetricsEvaluator)
+    return _EVALUATOR_POOL
+
+
+def _pooled_evaluate(data: pd.DataFrame, metrics: List[Any]) -> Any:
+    """evaluate() con un evaluador tomado del pool."""
+    with get_evaluator_pool().evaluator() as evaluator:
+        return evaluator.evaluate(data=data, metrics=metrics)
+
+
 # -----------------------------
 # Utilidades
 # -----------------------------
@@ -106,22 +217,19 @@ def _value_from(group_dict: Dict[str, Any], metric_key: str, idx: int) -> Option
     return None
 
 
-# -----------------------------
-# Función principal
-# -----------------------------
-def evaluate_governance(
+# Backend por métrica ("sdk" o "local"), p.ej. "answer_similarity=local,text_reading_ease=local"
+GOV_METRIC_BACKENDS = os.getenv("GOV_METRIC_BACKENDS") or ""
+
+
+def _build_dataframe(
     quiz: List[Dict[str, str]],
     user_answers: List[str],
     context_text: str,
     system_prompt: str,
     normalize_answers: bool = True,
-) -> List[Dict[str, Any]]:
-    """
-    Ejecuta métricas de watsonx.governance sobre las respuestas del usuario.
-    - Pasa system_prompt a las métricas que lo requieren (TopicRelevance/PromptSafetyRisk).
-    - Aísla errores por métrica para no romper todo el proceso.
-    """
-    # Dataset de entrada
+) -> pd.DataFrame:
+    """Arma el DataFrame de entrada con las columnas que esperan las métricas."""
+    pd = _sdk().pd
     rows = []
     for i, q in enumerate(quiz):
         ans = user_answers[i] if i < len(user_answers) else ""
@@ -143,21 +251,85 @@ def evaluate_governance(
     else:
         df["generated_text"] = df["user_answer"]
         df["ground_truth"]   = df["ideal_answer"]
+    return df
+
+
+def _local_keys(metric_backends: Optional[Dict[str, str]]) -> List[str]:
+    from services.local_metrics import LOCAL_METRICS, parse_backends
+
+    backends = parse_backends(GOV_METRIC_BACKENDS)
+    backends.update(metric_backends or {})
+    return [k for k, v in backends.items() if v == "local" and k in LOCAL_METRICS]
+
+
+# Mapeo de claves SDK -> claves de salida de evaluate_governance
+SDK_KEY_MAP: Dict[str, str] = {
+    "AnswerSimilarityMetric": "answer_similarity",
+    "AnswerRelevanceMetric": "answer_relevance",
+    "ContextRelevanceMetric": "context_relevance",
+    "FaithfulnessMetric": "faithfulness",
+    "EvasivenessMetric": "evasiveness",
+    "TopicRelevanceMetric": "topic_relevance",
+    "PromptSafetyRiskMetric": "prompt_safety_risk",
+    "HAPMetric": "hap",
+    "PIIMetric": "pii",
+    "ProfanityMetric": "profanity",
+    "SexualContentMetric": "sexual_content",
+    "ViolenceMetric": "violence",
+    "SocialBiasMetric": "social_bias",
+    "HarmMetric": "harm",
+    "HarmEngagementMetric": "harm_engagement",
+    "JailbreakMetric": "jailbreak",
+    "UnethicalBehaviorMetric": "unethical_behavior",
+    "TextReadingEaseMetric": "text_reading_ease",
+    "TextGradeLevelMetric": "text_grade_level",
+}
+
+
+# -----------------------------
+# Función principal
+# -----------------------------
+def evaluate_governance(
+    quiz: List[Dict[str, str]],
+    user_answers: List[str],
+    context_text: str,
+    system_prompt: str,
+    normalize_answers: bool = True,
+    metric_backends: Optional[Dict[str, str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Ejecuta métricas de watsonx.governance sobre las respuestas del usuario.
+    - Pasa system_prompt a las métricas que lo requieren (TopicRelevance/PromptSafetyRisk).
+    - Aísla errores por métrica para no romper todo el proceso.
+    - metric_backends: {"answer_similarity"|"text_reading_ease"|"text_grade_level": "local"|"sdk"}
+      (por defecto GOV_METRIC_BACKENDS); "local" calcula la métrica sin el SDK.
+    """
+    df = _build_dataframe(quiz, user_answers, context_text, system_prompt, normalize_answers)
+    local_keys = _local_keys(metric_backends)
+    local_values: Dict[str, List[Optional[float]]] = {}
+    if local_keys:
+        # Si el backend local falla (p. ej. falta scikit-learn), esas métricas van por el SDK
+        try:
+            from services.local_metrics import compute_local
+            local_values = compute_local(df, local_keys)
+        except Exception as e:
+            print("Backend local de métricas unavailable:", e)
 
     # Asegura un system_prompt válido para métricas que lo exigen (pydantic lo marca como required)
     sp = (system_prompt or "").strip()
     if not sp:
         sp = "Eres un asistente útil y seguro. Responde con precisión y sin divulgar datos sensibles."
 
-    evaluator = MetricsEvaluator()
 
-    # ---------- 1) Similaridad (siempre disponible en SDK) ----------
-    try:
-        sim = evaluator.evaluate(data=df, metrics=[AnswerSimilarityMetric()])
-        sim_rows = _extract_records(sim) or []
-    except Exception as e:
-        print("AnswerSimilarityMetric unavailable:", e)
-        sim_rows = []
+    # ---------- 1) Similaridad (si el SDK instalado la trae) ----------
+    sim_rows = []
+    sim_cls = _sdk().AnswerSimilarityMetric
+    if "answer_similarity" not in local_values and sim_cls is not None:
+        try:
+            sim = scheduled(_pooled_evaluate, data=df, metrics=[metric_instance(sim_cls)])
+            sim_rows = _extract_records(sim) or []
+        except Exception as e:
+            print("AnswerSimilarityMetric unavailable:", e)
 
     # ---------- 2) Groundedness básicos (no requieren system_prompt) ----------
     metrics_ground = [
@@ -174,7 +346,7 @@ def evaluate_governance(
             ground_results[key] = None
             continue
         try:
-            res = evaluator.evaluate(data=df, metrics=[M()])
+            res = scheduled(_pooled_evaluate, data=df, metrics=[metric_instance(M)])
             ground_results[key] = _extract_records(res)
         except Exception as e:
             ground_results[key] = None
@@ -193,7 +365,7 @@ def evaluate_governance(
             continue
         try:
             # ¡Aquí pasamos system_prompt!
-            res = evaluator.evaluate(data=df, metrics=[M(system_prompt=sp)])
+            res = scheduled(_pooled_evaluate, data=df, metrics=[metric_instance(M, system_prompt=sp)])
             ground_results[key] = _extract_records(res)
         except Exception as e:
             ground_results[key] = None
@@ -220,7 +392,7 @@ def evaluate_governance(
             safety_results[key] = None
             continue
         try:
-            res = evaluator.evaluate(data=df, metrics=[M()])
+            res = scheduled(_pooled_evaluate, data=df, metrics=[metric_instance(M)])
             safety_results[key] = _extract_records(res)
         except Exception as e:
             safety_results[key] = None
@@ -234,105 +406,105 @@ def evaluate_governance(
     read_results: Dict[str, Any] = {}
     for fq in metrics_read:
         key = fq.rsplit(".", 1)[-1]
+        if SDK_KEY_MAP[key] in local_values:
+            continue
         M = _metric(fq)
         if M is None:
             read_results[key] = None
             continue
         try:
-            res = evaluator.evaluate(data=df, metrics=[M()])
+            res = scheduled(_pooled_evaluate, data=df, metrics=[metric_instance(M)])
             read_results[key] = _extract_records(res)
         except Exception as e:
             read_results[key] = None
             print(f"{key} unavailable:", e)
 
-    # ---------- 6) Mapeo de claves y ensamblado de respuesta ----------
-    key_map = {
-        "AnswerSimilarityMetric": "answer_similarity",
-        "AnswerRelevanceMetric": "answer_relevance",
-        "ContextRelevanceMetric": "context_relevance",
-        "FaithfulnessMetric": "faithfulness",
-        "EvasivenessMetric": "evasiveness",
-        "TopicRelevanceMetric": "topic_relevance",
-        "PromptSafetyRiskMetric": "prompt_safety_risk",
-        "HAPMetric": "hap",
-        "PIIMetric": "pii",
-        "ProfanityMetric": "profanity",
-        "SexualContentMetric": "sexual_content",
-        "ViolenceMetric": "violence",
-        "SocialBiasMetric": "social_bias",
-        "HarmMetric": "harm",
-        "HarmEngagementMetric": "harm_engagement",
-        "JailbreakMetric": "jailbreak",
-        "UnethicalBehaviorMetric": "unethical_behavior",
-        "TextReadingEaseMetric": "text_reading_ease",
-        "TextGradeLevelMetric": "text_grade_level",
-    }
+    # ---------- 6) Ensamblado de respuesta ----------
 
     out: List[Dict[str, Any]] = []
     for i in range(len(df)):
         row: Dict[str, Any] = {}
 
         # Similaridad
-        row[key_map["AnswerSimilarityMetric"]] = _value_from({"AnswerSimilarityMetric": sim_rows}, "AnswerSimilarityMetric", i)
+        row[SDK_KEY_MAP["AnswerSimilarityMetric"]] = _value_from({"AnswerSimilarityMetric": sim_rows}, "AnswerSimilarityMetric", i)
 
         # Groundedness + las que requieren SP
         for k in list(ground_results.keys()):
-            row[key_map.get(k, k)] = _value_from(ground_results, k, i)
+            row[SDK_KEY_MAP.get(k, k)] = _value_from(ground_results, k, i)
 
         # Safety
         for k in list(safety_results.keys()):
-            row[key_map.get(k, k)] = _value_from(safety_results, k, i)
+            row[SDK_KEY_MAP.get(k, k)] = _value_from(safety_results, k, i)
 
         # Readability
         for k in list(read_results.keys()):
-            row[key_map.get(k, k)] = _value_from(read_results, k, i)
+            row[SDK_KEY_MAP.get(k, k)] = _value_from(read_results, k, i)
+
+        # Backend local
+        for k, vals in local_values.items():
+            row[k] = vals[i]
 
         out.append(row)
 
     return out
 
 
+# Métricas del SDK equivalentes a las del backend local (para calibración)
+_LOCAL_SDK_FQCN = {
+    "answer_similarity": "ibm_watsonx_gov.metrics.AnswerSimilarityMetric",
+    "text_reading_ease": "ibm_watsonx_gov.metrics.text_reading_ease.text_reading_ease_metric.TextReadingEaseMetric",
+    "text_grade_level": "ibm_watsonx_gov.metrics.text_grade_level.text_grade_level_metric.TextGradeLevelMetric",
+}
 
 
+def calibrate_local_metrics(
+    quiz: List[Dict[str, str]],
+    user_answers: List[str],
+    context_text: str,
+    system_prompt: str,
+    normalize_answers: bool = True,
+) -> Dict[str, Any]:
+    """
+    Compara el backend local con el SDK sobre el mismo dataset.
+    Devuelve por métrica: n, mae, max_abs_err, bias y pearson (ver local_metrics.compare).
+    """
+    from services.local_metrics import compare
 
+    return compare(*calibration_values(quiz, user_answers, context_text, system_prompt, normalize_answers))
 
 
-# --- imports que necesita este bloque ---
-import os
-import re
-import logging
-import pprint
-from typing import Any, Dict, List, Optional
+def calibration_values(
+    quiz: List[Dict[str, str]],
+    user_answers: List[str],
+    context_text: str,
+    system_prompt: str,
+    normalize_answers: bool = True,
+) -> Tuple[Dict[str, List[Optional[float]]], Dict[str, List[Optional[float]]]]:
+    """
+    Valores por fila (local, sdk) de las métricas con backend local, para
+    acumular varios grupos antes de llamar a local_metrics.compare (bulk_eval --calibrate).
+    """
+    from services.local_metrics import LOCAL_METRICS, compute_local
+
+    df = _build_dataframe(quiz, user_answers, context_text, system_prompt, normalize_answers)
+    local = compute_local(df, list(LOCAL_METRICS))
+
+    sdk: Dict[str, List[Optional[float]]] = {}
+    for key, fq in _LOCAL_SDK_FQCN.items():
+        M = _metric(fq)
+        if M is None:
+            continue
+        try:
+            recs = _extract_records(scheduled(_pooled_evaluate, data=df, metrics=[metric_instance(M)]))
+        except Exception as e:
+            print(f"{key} unavailable:", e)
+            continue
+        name = fq.rsplit(".", 1)[-1]
+        sdk[key] = [_value_from({name: recs}, name, i) for i in range(len(df))]
+
+    return local, sdk
 
-# Para el evaluador real (si está instalado)
-try:
-    import pandas as pd
-    # OJO: los imports concretos pueden variar según versión del SDK.
-    # Ajusta estos imports a tu versión de watsonx.governance:
-    from ibm_watsonx_gov.evaluators.metrics_evaluator import MetricsEvaluator
-    from ibm_watsonx_gov.metrics import (
-        UnethicalBehaviorMetric,
-        JailbreakMetric,
-        SocialBiasMetric,
-        ProfanityMetric,
-        HarmMetric,
-        HarmEngagementMetric,
-        SexualContentMetric,
-        ViolenceMetric,
-        EvasivenessMetric,
-        AnswerRelevanceMetric,
-        FaithfulnessMetric,
-        TopicRelevanceMetric,
-        ContextRelevanceMetric,
-        AnswerSimilarityMetric,
-        # PromptSafetyRiskMetric,  # si la tienes disponible en tu SDK
-    )
-    _SDK_AVAILABLE = True
-except Exception as e:
-    logging.warning("watsonx.governance SDK no disponible o no importable: %s", e)
-    _SDK_AVAILABLE = False
 
-LOGGER = logging.getLogger(__name__)
 
 # ==========
 #  DEMO MAP
@@ -387,6 +559,10 @@ ALL_FRONT_KEYS: List[str] = [
     # "prompt_safety_risk",
 ]
 
+# Todas las claves numéricas de métricas que pueden salir de evaluate_governance /
+# score_governance_text (allowlist del historial)
+METRIC_KEYS = frozenset(SDK_KEY_MAP.values()) | frozenset(ALL_FRONT_KEYS)
+
 def _demo_scores(text: str) -> Dict[str, float]:
     """
     Devuelve un dict con valores 'demo' SI el texto calza con alguna
@@ -402,6 +578,10 @@ def _demo_scores(text: str) -> Dict[str, float]:
             return out
     return {}
 
+def is_demo_text(text: str) -> bool:
+    """True si el texto calza con una regla DEMO (respuesta barata, sin llamar al SDK)."""
+    return bool(_demo_scores((text or "").strip()))
+
 # ===================================
 #  EVALUACIÓN REAL (watsonx.gov)
 # ===================================
@@ -447,9 +627,12 @@ def _extract_metric_value(obj: Any, keys=("score", "value", "confidence", "prob"
 def _evaluate_real_metrics(text: str) -> Dict[str, float]:
     """
     Intenta evaluar con watsonx.governance. Si algo falla, levanta excepción.
+    Devuelve solo las métricas que el SDK calculó de verdad (sin rellenar con 0.0).
     """
-    if not _SDK_AVAILABLE:
+    if not sdk_available():
         raise RuntimeError("SDK de watsonx.governance no disponible")
+    sdk = _sdk()
+    pd = sdk.pd
 
     sp = "Eres un asistente útil y seguro. Responde con precisión y sin divulgar datos sensibles."
 
@@ -464,30 +647,33 @@ def _evaluate_real_metrics(text: str) -> Dict[str, float]:
         "system_prompt": sp,
     }])
 
-    # 2) Instanciamos el evaluador + lista de métricas
-    evaluator = MetricsEvaluator()
+    # 2) Lista de métricas (instancias reutilizables; el evaluador sale del pool)
     metrics = [
-        UnethicalBehaviorMetric(),
-        JailbreakMetric(),
-        SocialBiasMetric(),
-        ProfanityMetric(),
-        HarmMetric(),
-        HarmEngagementMetric(),
-        SexualContentMetric(),
-        ViolenceMetric(),
-        EvasivenessMetric(),
-        # Las de "answer/context/topic/faithfulness/similarity" suelen requerir QA/RAG;
-        # se incluyen por compatibilidad, pero pueden devolver 0 en "texto libre".
-        AnswerRelevanceMetric(),
-        FaithfulnessMetric(),
-        TopicRelevanceMetric(system_prompt=sp),  # esta sí requiere system_prompt en algunas versiones
-        ContextRelevanceMetric(),
-        AnswerSimilarityMetric(),
-        # PromptSafetyRiskMetric(),  # si la usas, probablemente también requiere system_prompt
+        metric_instance(cls, **kwargs)
+        for cls, kwargs in (
+            (sdk.UnethicalBehaviorMetric, {}),
+            (sdk.JailbreakMetric, {}),
+            (sdk.SocialBiasMetric, {}),
+            (sdk.ProfanityMetric, {}),
+            (sdk.HarmMetric, {}),
+            (sdk.HarmEngagementMetric, {}),
+            (sdk.SexualContentMetric, {}),
+            (sdk.ViolenceMetric, {}),
+            (sdk.EvasivenessMetric, {}),
+            # Las de "answer/context/topic/faithfulness/similarity" suelen requerir QA/RAG;
+            # se incluyen por compatibilidad, pero pueden devolver 0 en "texto libre".
+            (sdk.AnswerRelevanceMetric, {}),
+            (sdk.FaithfulnessMetric, {}),
+            (sdk.TopicRelevanceMetric, {"system_prompt": sp}),  # esta sí requiere system_prompt en algunas versiones
+            (sdk.ContextRelevanceMetric, {}),
+            (sdk.AnswerSimilarityMetric, {}),
+            # PromptSafetyRiskMetric,  # si la usas, probablemente también requiere system_prompt
+        )
+        if cls is not None  # clases ausentes en esta versión del SDK
     ]
 
     # 3) Ejecutamos
-    res = evaluator.evaluate(data=df, metrics=metrics)
+    res = scheduled(_pooled_evaluate, data=df, metrics=metrics)
     if os.getenv("LOG_RAW_GOV", "0") == "1":
         print("\n[watsonx.governance][RAW RESULT]")
         try:
@@ -526,7 +712,7 @@ def _evaluate_real_metrics(text: str) -> Dict[str, float]:
     else:
         raw = {}
 
-    out: Dict[str, float] = {k: 0.0 for k in ALL_FRONT_KEYS}
+    out: Dict[str, float] = {}
 
     metrics_result = raw.get("metrics_result")
     if isinstance(metrics_result, list):
@@ -569,12 +755,14 @@ def _evaluate_real_metrics(text: str) -> Dict[str, float]:
 #  FUNCIÓN PÚBLICA: decide DEMO o EVALUACIÓN REAL según texto
 # ===========================================================
 
-def evaluate_governance_text(text: str) -> Dict[str, float]:
+def score_governance_text(text: str) -> Tuple[Dict[str, float], Dict[str, float]]:
     """
-    Evalúa una sola oración/texto y devuelve un dict de métricas 0..1.
-    - Si el texto calza con los ejemplos predefinidos (demo), devuelve el DEMO.
-    - Si no calza, intenta usar watsonx.governance real.
-    - Si falla el SDK / credenciales, cae a un fallback estable (cero).
+    Evalúa una sola oración/texto. Devuelve (scores, medidas):
+    - scores: dict de métricas 0..1 para el front, siempre con todas las claves.
+      Si el texto calza con los ejemplos predefinidos (demo), es el DEMO; si falla
+      el SDK / credenciales, cae a un fallback estable (cero).
+    - medidas: solo las métricas que watsonx.governance calculó de verdad
+      ({} en demo o fallback); es lo que debe ir al historial.
     """
     text = text or ""
     text_norm = text.strip()
@@ -582,14 +770,19 @@ def evaluate_governance_text(text: str) -> Dict[str, float]:
     # 1) DEMO (para los ejemplos predefinidos del tablero)
     demo = _demo_scores(text_norm)
     if demo:
-        return demo
+        return demo, {}
 
-    # 2) Evaluación real
+    # 2) Evaluación real (las métricas que no vinieron quedan en 0.0 para el front)
     try:
         real = _evaluate_real_metrics(text_norm)
-        return real
+        return {**{k: 0.0 for k in ALL_FRONT_KEYS}, **real}, real
     except Exception as e:
         LOGGER.error("Fallo evaluación real de governance: %s", e, exc_info=True)
 
     # 3) Fallback estable: todo 0.0 (no rompe el front)
-    return {k: 0.0 for k in ALL_FRONT_KEYS}
+    return {k: 0.0 for k in ALL_FRONT_KEYS}, {}
+
+
+def evaluate_governance_text(text: str) -> Dict[str, float]:
+    """Evalúa una sola oración/texto y devuelve un dict de métricas 0..1 (ver score_governance_text)."""
+    return score_governance_text(text)[0]
@@ -0,0 +1,179 @@
+# services/hedging.py
+# Peticiones "hedged" para reducir la latencia de cola (p99) de watsonx.ai.
+# Si una llamada no responde dentro de un percentil adaptativo de la latencia
+# reciente, se lanza un duplicado idéntico y se usa el primero que termine.
+# Solo es seguro con decodificación determinista (greedy, temperature=0).
+#
+# Cada intento (primario y duplicado) ocupa su propio slot del planificador
+# (services.scheduler) durante toda su ejecución, así GOV_SCHED_SLOTS acota
+# las llamadas upstream reales, incluida una perdedora que siga en vuelo.
+
+from __future__ import annotations
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict
+
+from services.scheduler import get_scheduler
+
+WXA_HEDGE_ENABLED    = (os.getenv("WXA_HEDGE_ENABLED") or "0").strip() == "1"
+WXA_HEDGE_PERCENTILE = float(os.getenv("WXA_HEDGE_PERCENTILE") or "95")
+WXA_HEDGE_BUDGET     = float(os.getenv("WXA_HEDGE_BUDGET") or "0.05")   # fracción de llamadas extra
+WXA_HEDGE_MIN_MS     = int(os.getenv("WXA_HEDGE_MIN_MS") or "500")
+WXA_HEDGE_WINDOW     = int(os.getenv("WXA_HEDGE_WINDOW") or "200")      # muestras de latencia
+WXA_HEDGE_MIN_SAMPLES = int(os.getenv("WXA_HEDGE_MIN_SAMPLES") or "20")
+
+
+class HedgedCaller:
+    """
+    Ejecuta una función con hedging:
+    - Mide la latencia de las llamadas (ventana deslizante).
+    - Espera hasta el percentil configurado; si no hay respuesta, lanza un duplicado.
+    - Respeta un presupuesto global: hedges <= budget * llamadas.
+    """
+
+    def __init__(
+        self,
+        percentile: float = WXA_HEDGE_PERCENTILE,
+        budget: float = WXA_HEDGE_BUDGET,
+        min_delay_ms: int = WXA_HEDGE_MIN_MS,
+        window: int = WXA_HEDGE_WINDOW,
+        min_samples: int = WXA_HEDGE_MIN_SAMPLES,
+        max_workers: int = 8,
+    ):
+        self.percentile = max(0.0, min(100.0, percentile))
+        self.budget = max(0.0, budget)
+        self.min_delay = max(0, min_delay_ms) / 1000.0
+        self.min_samples = max(1, min_samples)
+        self._latencies: Deque[float] = deque(maxlen=max(1, window))
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="wxa-hedge")
+
+    # -----------------------------
+    # Estadísticas
+    # -----------------------------
+    def _record(self, seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(seconds)
+
+    def hedge_delay(self) -> float | None:
+        """Segundos a esperar antes del hedge, o None si aún no hay muestras suficientes."""
+        with self._lock:
+            if len(self._latencies) < self.min_samples:
+                return None
+            data = sorted(self._latencies)
+        idx = min(len(data) - 1, int(round(self.percentile / 100.0 * (len(data) - 1))))
+        return max(self.min_delay, data[idx])
+
+    def _take_budget(self) -> bool:
+        with self._lock:
+            if self._hedges + 1 > self.budget * self._calls:
+                return False
+            self._hedges += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "hedges": self._hedges,
+                "hedge_wins": self._hedge_wins,
+                "hedge_ratio": (self._hedges / self._calls) if self._calls else 0.0,
+                "samples": len(self._latencies),
+            }
+
+    # -----------------------------
+    # Ejecución
+    # -----------------------------
+    def _attempt(self, started: threading.Event, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Un intento: toma un slot del planificador y mide solo la llamada
+        upstream (sin la espera en cola). `started` se marca al obtener el slot.
+        """
+        try:
+            with get_scheduler().slot():
+                started.set()
+                t0 = time.monotonic()
+                res = fn(*args, **kwargs)
+                self._record(time.monotonic() - t0)
+                return res
+        finally:
+            started.set()
+
+    def _submit(self, started: threading.Event, fn: Callable[..., Any], *args, **kwargs):
+        # Propaga la prioridad/tenant del request (contextvars) al hilo del pool
+        ctx = contextvars.copy_context()
+        return self._pool.submit(ctx.run, self._attempt, started, fn, *args, **kwargs)
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Llama a fn(*args, **kwargs) con hedging. Devuelve el primer resultado
+        exitoso; si ambas llamadas fallan, propaga la excepción de la primaria.
+        """
+        with self._lock:
+            self._calls += 1
+
+        delay = self.hedge_delay()
+        if delay is None:
+            # Sin historia suficiente: llamada directa (y aprendemos la latencia)
+            return self._attempt(threading.Event(), fn, *args, **kwargs)
+
+        started = threading.Event()
+        primary = self._submit(started, fn, *args, **kwargs)
+        # El plazo del hedge corre desde que la primaria sale a upstream, no
+        # mientras espera slot: duplicar algo que está en cola solo suma cola.
+        started.wait()
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_budget():
+            return primary.result()
+
+        backup = self._submit(threading.Event(), fn, *args, **kwargs)
+        pending = {primary, backup}
+        first_error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                err = fut.exception()
+                if err is None:
+                    # "Cancelamos" la otra: si no arrancó no se ejecuta; si ya está
+                    # en vuelo, el SDK no permite abortarla y su resultado se descarta.
+                    for other in pending:
+                        other.cancel()
+                    if fut is backup:
+                        with self._lock:
+                            self._hedge_wins += 1
+                    return fut.result()
+                if fut is primary or first_error is None:
+                    first_error = err
+        raise first_error  # type: ignore[misc]
+
+
+_HEDGER: HedgedCaller | None = None
+_HEDGER_LOCK = threading.Lock()
+
+
+def get_hedger() -> HedgedCaller:
+    """Instancia compartida por proceso (cada worker de gunicorn tiene la suya)."""
+    global _HEDGER
+    if _HEDGER is None:
+        with _HEDGER_LOCK:
+            if _HEDGER is None:
+                _HEDGER = HedgedCaller()
+    return _HEDGER
+
+
+def hedged_call(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Llamada saliente a través del planificador; con hedging si WXA_HEDGE_ENABLED=1.
+    Cada intento toma su propio slot (no envolver en scheduled()).
+    """
+    if not WXA_HEDGE_ENABLED:
+        with get_scheduler().slot():
+            return fn(*args, **kwargs)
+    return get_hedger().call(fn, *args, **kwargs)
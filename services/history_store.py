@@ -0,0 +1,309 @@
+# services/history_store.py
+# Historial append-only de evaluaciones (SQLite en modo WAL).
+#
+# - results: una fila por (evaluación, métrica), con índices por quiz,
+#   pregunta, respuesta (hash del texto evaluado), métrica y tiempo.
+# - aggregates: estadísticas por (día, quiz, pregunta, respuesta, métrica) que
+#   se actualizan en la misma transacción del insert, así las consultas del
+#   tablero no recorren el historial completo ni vuelven a pagar métricas.
+# - answers: texto (truncado) de cada hash de respuesta, para mostrarlo al
+#   agrupar por respuesta (GOV_HISTORY_ANSWER_TEXT=0 guarda solo el hash).
+# Solo se guardan métricas conocidas (governance_eval.METRIC_KEYS + veredicto).
+#
+# Las escrituras se hacen en un hilo en segundo plano para no sumar latencia
+# a las respuestas.
+
+from __future__ import annotations
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from services.governance_eval import METRIC_KEYS
+
+GOV_HISTORY_DB          = (os.getenv("GOV_HISTORY_DB") or "data/evaluations.db").strip()
+GOV_HISTORY_THRESHOLD   = float(os.getenv("GOV_HISTORY_THRESHOLD") or "0.5")  # valor que cuenta como "dispara"
+GOV_HISTORY_ANSWER_TEXT = (os.getenv("GOV_HISTORY_ANSWER_TEXT") or "1").strip() == "1"
+GOV_HISTORY_ANSWER_MAX  = 500  # caracteres guardados por respuesta
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id       INTEGER PRIMARY KEY,
+    ts       REAL NOT NULL,
+    day      TEXT NOT NULL,
+    source   TEXT NOT NULL,
+    quiz_id  TEXT NOT NULL DEFAULT '',
+    question TEXT NOT NULL DEFAULT '',
+    answer_hash TEXT NOT NULL DEFAULT '',
+    metric   TEXT NOT NULL,
+    value    REAL
+);
+CREATE INDEX IF NOT EXISTS ix_results_metric_ts   ON results (metric, ts);
+CREATE INDEX IF NOT EXISTS ix_results_quiz_ts     ON results (quiz_id, metric, ts);
+CREATE INDEX IF NOT EXISTS ix_results_question_ts ON results (question, metric, ts);
+CREATE INDEX IF NOT EXISTS ix_results_answer_ts   ON results (answer_hash, metric, ts);
+
+CREATE TABLE IF NOT EXISTS aggregates (
+    day      TEXT NOT NULL,
+    quiz_id  TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer_hash TEXT NOT NULL DEFAULT '',
+    metric   TEXT NOT NULL,
+    n        INTEGER NOT NULL,
+    total    REAL NOT NULL,
+    total_sq REAL NOT NULL,
+    min      REAL,
+    max      REAL,
+    n_high   INTEGER NOT NULL,
+    PRIMARY KEY (day, quiz_id, question, answer_hash, metric)
+);
+CREATE INDEX IF NOT EXISTS ix_agg_metric_day    ON aggregates (metric, day);
+CREATE INDEX IF NOT EXISTS ix_agg_answer_metric ON aggregates (answer_hash, metric);
+
+CREATE TABLE IF NOT EXISTS answers (
+    answer_hash TEXT PRIMARY KEY,
+    text        TEXT NOT NULL
+);
+"""
+
+_UPSERT_AGG = """
+INSERT INTO aggregates (day, quiz_id, question, answer_hash, metric, n, total, total_sq, min, max, n_high)
+VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?)
+ON CONFLICT (day, quiz_id, question, answer_hash, metric) DO UPDATE SET
+    n        = n + 1,
+    total    = total + excluded.total,
+    total_sq = total_sq + excluded.total_sq,
+    min      = MIN(min, excluded.min),
+    max      = MAX(max, excluded.max),
+    n_high   = n_high + excluded.n_high
+"""
+
+# Campos de texto de correct_answer que se guardan como conteos (verdict=Correcta -> 1.0)
+_CATEGORICAL = ("wx_verdict",)
+
+_GROUP_COLUMNS = {"question": "question", "quiz": "quiz_id", "metric": "metric", "day": "day",
+                  "answer": "answer_hash"}
+_ORDER_COLUMNS = {"avg", "n", "high_rate", "max", "min"}
+
+
+def quiz_id_for(quiz: Iterable[Dict[str, Any]]) -> str:
+    """Identificador estable de un quiz (hash de sus preguntas)."""
+    h = hashlib.sha1()
+    for q in quiz:
+        h.update(str(q.get("question", "")).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()[:12]
+
+
+def answer_hash(text: str) -> str:
+    """Hash estable del texto evaluado (ignora mayúsculas y espacios repetidos)."""
+    norm = " ".join(str(text or "").split()).casefold()
+    return hashlib.sha1(norm.encode("utf-8")).hexdigest()[:16] if norm else ""
+
+
+def _metric_items(row: Dict[str, Any]) -> List[Tuple[str, float]]:
+    # Allowlist: las filas traen también index/id/wx_tokens…, que no son métricas
+    items = []
+    for k, v in row.items():
+        if k in _CATEGORICAL:
+            if v:
+                items.append((f"{k}={v}", 1.0))
+            continue
+        if k not in METRIC_KEYS or isinstance(v, bool) or not isinstance(v, (int, float)):
+            continue
+        if v != v:  # NaN
+            continue
+        items.append((k, float(v)))
+    return items
+
+
+class HistoryStore:
+    def __init__(self, path: str = GOV_HISTORY_DB, threshold: float = GOV_HISTORY_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        d = os.path.dirname(path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        self._local = threading.local()
+        with self._conn() as con:
+            migrate_aggregates = self._migrate(con)
+            con.executescript(_SCHEMA)
+            if migrate_aggregates:
+                con.execute(
+                    "INSERT INTO aggregates (day, quiz_id, question, answer_hash, metric, n, total, total_sq, "
+                    "min, max, n_high) SELECT day, quiz_id, question, '', metric, n, total, total_sq, "
+                    "min, max, n_high FROM aggregates_old"
+                )
+                con.execute("DROP TABLE aggregates_old")
+        self._queue: "queue.Queue[Tuple[str, str, List[Tuple[str, str, Dict[str, Any]]], float]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def _migrate(con: sqlite3.Connection) -> bool:
+        """
+        Agrega answer_hash a una base creada antes de esa columna. Devuelve True si
+        aggregates se renombró (cambia su clave primaria) y hay que copiarla de vuelta.
+        """
+        def columns(table: str) -> List[str]:
+            return [r[1] for r in con.execute(f"PRAGMA table_info({table})")]
+
+        cols = columns("results")
+        if cols and "answer_hash" not in cols:
+            con.execute("ALTER TABLE results ADD COLUMN answer_hash TEXT NOT NULL DEFAULT ''")
+        cols = columns("aggregates")
+        if cols and "answer_hash" not in cols:
+            con.execute("DROP INDEX IF EXISTS ix_agg_metric_day")
+            con.execute("ALTER TABLE aggregates RENAME TO aggregates_old")
+            return True
+        return False
+
+    def _conn(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    # -----------------------------
+    # Escritura
+    # -----------------------------
+    def record(self, source: str, rows: List[Dict[str, Any]], quiz_id: str = "",
+               questions: Optional[List[str]] = None, answers: Optional[List[str]] = None) -> None:
+        """
+        Encola filas de resultados (las de evaluate_governance + correct_answer,
+        o las métricas medidas de score_governance_text). `answers` son los
+        textos evaluados, uno por fila. No bloquea.
+        """
+        qs = questions or []
+        ans = answers or []
+        items = [(qs[i] if i < len(qs) else "", ans[i] if i < len(ans) else "", r) for i, r in enumerate(rows)]
+        self._queue.put((source, quiz_id, items, time.time()))
+
+    def flush(self) -> None:
+        """Espera a que se escriba todo lo encolado."""
+        self._queue.join()
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                print("history store: error escribiendo:", e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch) -> None:
+        con = self._conn()
+        with con:  # una transacción por lote
+            for source, quiz_id, items, ts in batch:
+                day = time.strftime("%Y-%m-%d", time.gmtime(ts))
+                for question, answer, row in items:
+                    metrics = _metric_items(row)
+                    if not metrics:
+                        continue
+                    ah = answer_hash(answer)
+                    if ah and GOV_HISTORY_ANSWER_TEXT:
+                        con.execute("INSERT OR IGNORE INTO answers (answer_hash, text) VALUES (?, ?)",
+                                    (ah, str(answer)[:GOV_HISTORY_ANSWER_MAX]))
+                    for metric, value in metrics:
+                        con.execute(
+                            "INSERT INTO results (ts, day, source, quiz_id, question, answer_hash, metric, value) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            (ts, day, source, quiz_id, question, ah, metric, value),
+                        )
+                        con.execute(_UPSERT_AGG, (
+                            day, quiz_id, question, ah, metric, value, value * value, value, value,
+                            1 if value >= self.threshold else 0,
+                        ))
+
+    # -----------------------------
+    # Consultas (sobre aggregates)
+    # -----------------------------
+    def stats(self, metric: Optional[str] = None, quiz_id: Optional[str] = None,
+              question: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None,
+              group_by: str = "question", order_by: str = "avg", ascending: bool = False,
+              limit: int = 50, answer: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Estadísticas agregadas. since/until son fechas YYYY-MM-DD (UTC, inclusivas).
+        group_by: question | quiz | metric | day | answer. order_by: avg | n | high_rate | max | min.
+        `answer` filtra por hash de respuesta; con group_by=answer cada fila trae
+        también el texto ("text") si se guardó.
+        """
+        if group_by not in _GROUP_COLUMNS:
+            raise ValueError(f"group_by inválido: {group_by}")
+        if order_by not in _ORDER_COLUMNS:
+            raise ValueError(f"order_by inválido: {order_by}")
+        col = _GROUP_COLUMNS[group_by]
+        where, params = [], []
+        for clause, value in (("metric = ?", metric), ("quiz_id = ?", quiz_id),
+                              ("question = ?", question), ("answer_hash = ?", answer),
+                              ("day >= ?", since), ("day <= ?", until)):
+            if value:
+                where.append(clause)
+                params.append(value)
+        if group_by == "answer":
+            where.append("answer_hash != ''")  # filas sin texto (p. ej. anteriores a la columna)
+        sql = (
+            f"SELECT {col} AS key, SUM(n) AS n, SUM(total) AS total, SUM(total_sq) AS total_sq, "
+            f"MIN(min) AS min, MAX(max) AS max, SUM(n_high) AS n_high FROM aggregates "
+            + (f"WHERE {' AND '.join(where)} " if where else "")
+            + f"GROUP BY {col}"
+        )
+        out = []
+        for key, n, total, total_sq, mn, mx, n_high in self._conn().execute(sql, params):
+            avg = total / n if n else None
+            var = max(0.0, total_sq / n - avg * avg) if n else None
+            out.append({
+                group_by: key, "n": n, "avg": avg, "std": var ** 0.5 if var is not None else None,
+                "min": mn, "max": mx, "high_rate": (n_high / n) if n else None,
+            })
+        sign = 1 if ascending else -1
+        out.sort(key=lambda r: (r[order_by] is None, sign * (r[order_by] or 0)))
+        out = out[:max(1, limit)]
+        if group_by == "answer" and out:
+            keys = [r["answer"] for r in out]
+            texts = dict(self._conn().execute(
+                f"SELECT answer_hash, text FROM answers WHERE answer_hash IN ({','.join('?' * len(keys))})", keys))
+            for r in out:
+                r["text"] = texts.get(r["answer"])
+        return out
+
+
+_STORE: Optional[HistoryStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_store() -> Optional[HistoryStore]:
+    """Store compartido por proceso; None si está deshabilitado (GOV_HISTORY_DB=off)."""
+    global _STORE
+    if GOV_HISTORY_DB.lower() in ("", "0", "off", "none"):
+        return None
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = HistoryStore()
+    return _STORE
+
+
+def record(source: str, rows: List[Dict[str, Any]], quiz_id: str = "",
+           questions: Optional[List[str]] = None, answers: Optional[List[str]] = None) -> None:
+    """Registra en el historial si está habilitado; nunca rompe la petición."""
+    try:
+        store = get_store()
+        if store is not None:
+            store.record(source, rows, quiz_id, questions, answers)
+    except Exception as e:
+        print("history store no disponible:", e)
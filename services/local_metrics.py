@@ -0,0 +1,134 @@
+# services/local_metrics.py
+# Backend local (sin SDK) para métricas baratas de calcular:
+#   - answer_similarity: coseno de conteos (hasheados) de n-gramas de caracteres
+#     entre generated_text y ground_truth. Sin IDF ni vocabulario ajustado al
+#     lote: el puntaje de un par no depende de las demás filas (historial,
+#     calibración y comparaciones en el tiempo siguen siendo válidos).
+#   - text_reading_ease / text_grade_level: fórmulas de Flesch sobre generated_text.
+# Todo se calcula para el DataFrame completo de una vez (vectorizado).
+
+from __future__ import annotations
+import math
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+_WORD_RE = r"[^\W\d_]+"
+_SENT_RE = r"[.!?…]+"
+_VOWEL_GROUP_RE = r"[aeiouyáéíóúüàèìòùâêîôû]+"
+
+
+_HASHER = None
+
+
+def _hasher():
+    # HashingVectorizer no tiene estado (no se ajusta): se crea una vez por proceso
+    global _HASHER
+    if _HASHER is None:
+        from sklearn.feature_extraction.text import HashingVectorizer
+        _HASHER = HashingVectorizer(analyzer="char_wb", ngram_range=(2, 4), lowercase=True,
+                                    n_features=2 ** 20, alternate_sign=False, norm="l2")
+    return _HASHER
+
+
+def answer_similarity(df: pd.DataFrame) -> np.ndarray:
+    """Coseno de conteos de n-gramas de caracteres (2..4) entre generated_text y ground_truth, por fila."""
+    gen = df["generated_text"].fillna("").astype(str).tolist()
+    ref = df["ground_truth"].fillna("").astype(str).tolist()
+    n = len(gen)
+    if n == 0:
+        return np.zeros(0)
+    m = _hasher().transform(gen + ref)  # filas normalizadas L2 (vacías quedan en cero)
+    sims = np.asarray(m[:n].multiply(m[n:]).sum(axis=1)).ravel()
+    return np.clip(sims, 0.0, 1.0)
+
+
+def _readability_counts(texts: pd.Series):
+    s = texts.fillna("").astype(str).str.lower()
+    words = s.str.count(_WORD_RE).to_numpy(dtype=float)
+    sentences = np.maximum(1.0, s.str.count(_SENT_RE).to_numpy(dtype=float))
+    # Sílabas ~ grupos de vocales, con mínimo de una por palabra
+    syllables = np.maximum(words, s.str.count(_VOWEL_GROUP_RE).to_numpy(dtype=float))
+    return words, sentences, syllables
+
+
+def text_reading_ease(df: pd.DataFrame) -> np.ndarray:
+    """Flesch Reading Ease sobre generated_text (NaN si no hay palabras)."""
+    w, s, syl = _readability_counts(df["generated_text"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 206.835 - 1.015 * (w / s) - 84.6 * (syl / w)
+    return np.where(w > 0, out, np.nan)
+
+
+def text_grade_level(df: pd.DataFrame) -> np.ndarray:
+    """Flesch-Kincaid Grade Level sobre generated_text (NaN si no hay palabras)."""
+    w, s, syl = _readability_counts(df["generated_text"])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 0.39 * (w / s) + 11.8 * (syl / w) - 15.59
+    return np.where(w > 0, out, np.nan)
+
+
+# Claves de salida (las mismas que usa evaluate_governance) -> función local
+LOCAL_METRICS: Dict[str, Callable[[pd.DataFrame], np.ndarray]] = {
+    "answer_similarity": answer_similarity,
+    "text_reading_ease": text_reading_ease,
+    "text_grade_level": text_grade_level,
+}
+
+
+def parse_backends(spec: Optional[str]) -> Dict[str, str]:
+    """
+    Convierte "answer_similarity=local,text_grade_level=sdk" en dict.
+    Un nombre sin "=" equivale a "=local".
+    """
+    out: Dict[str, str] = {}
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        k, _, v = part.partition("=")
+        out[k.strip()] = (v.strip() or "local").lower()
+    return out
+
+
+def compute_local(df: pd.DataFrame, keys: List[str]) -> Dict[str, List[Optional[float]]]:
+    """
+    Calcula las métricas locales pedidas; devuelve {clave: [valor por fila]}.
+    Una métrica que falla se omite (y el llamador puede usar el SDK para ella).
+    """
+    out: Dict[str, List[Optional[float]]] = {}
+    for k in keys:
+        try:
+            vals = LOCAL_METRICS[k](df)
+            out[k] = [None if (v is None or math.isnan(v)) else float(v) for v in vals]
+        except Exception as e:
+            print(f"{k} (local) unavailable:", e)
+    return out
+
+
+def compare(local: Dict[str, List[Optional[float]]], sdk: Dict[str, List[Optional[float]]]) -> Dict[str, Any]:
+    """
+    Informe de calibración local vs SDK por métrica:
+    n, error absoluto medio/máximo, sesgo medio (local - sdk) y correlación de Pearson.
+    """
+    report: Dict[str, Any] = {}
+    for k, lv in local.items():
+        pairs = [(a, b) for a, b in zip(lv, sdk.get(k) or []) if a is not None and b is not None]
+        if not pairs:
+            report[k] = {"n": 0}
+            continue
+        a = np.array([p[0] for p in pairs])
+        b = np.array([p[1] for p in pairs])
+        diff = a - b
+        corr = None
+        if len(pairs) > 1 and a.std() > 0 and b.std() > 0:
+            corr = float(np.corrcoef(a, b)[0, 1])
+        report[k] = {
+            "n": len(pairs),
+            "mae": float(np.abs(diff).mean()),
+            "max_abs_err": float(np.abs(diff).max()),
+            "bias": float(diff.mean()),
+            "pearson": corr,
+        }
+    return report
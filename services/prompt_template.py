@@ -0,0 +1,165 @@
+# services/prompt_template.py
+# Plantilla de los prompts de corrección + límite de decodificación adaptativo.
+#
+# - El prefijo (system prompt + instrucciones JSON estrictas + contexto) es
+#   idéntico para todas las preguntas de un quiz: se arma una vez por
+#   (system_prompt, contexto) y solo se concatena la cola por pregunta.
+#   Un prefijo byte-a-byte estable es además lo que permite a un backend con
+#   caché de prefijos reutilizar su trabajo.
+# - max_new_tokens se ajusta al tamaño observado de los JSON de veredicto
+#   (percentil alto + holgura), en lugar de pedir siempre 250 tokens.
+#
+# Contabilidad de tokens: la línea base es lo que habría generado el flujo de
+# límite fijo, es decir, los tokens del intento final (con el stop en el cierre del JSON un
+# veredicto completo mide lo mismo con cualquier límite que no lo corte).
+# El ahorro real en tokens GENERADOS es 0 cuando el límite no corta y negativo
+# cuando corta y hay que reintentar (el primer intento se pierde); lo que el
+# límite adaptativo reduce es el presupuesto PEDIDO (max_new_tokens), que se
+# informa aparte.
+
+from __future__ import annotations
+import math
+import os
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Any, Deque, Dict
+
+WXA_MAX_NEW_TOKENS     = int(os.getenv("WXA_MAX_NEW_TOKENS") or "250")
+WXA_MIN_NEW_TOKENS     = int(os.getenv("WXA_MIN_NEW_TOKENS") or "64")
+WXA_ADAPTIVE_TOKENS    = (os.getenv("WXA_ADAPTIVE_TOKENS") or "1").strip() == "1"
+WXA_TOKENS_PERCENTILE  = float(os.getenv("WXA_TOKENS_PERCENTILE") or "98")
+WXA_TOKENS_HEADROOM    = float(os.getenv("WXA_TOKENS_HEADROOM") or "1.25")
+WXA_TOKENS_MIN_SAMPLES = int(os.getenv("WXA_TOKENS_MIN_SAMPLES") or "10")
+WXA_CHARS_PER_TOKEN    = float(os.getenv("WXA_CHARS_PER_TOKEN") or "3.5")  # estimación si el SDK no informa tokens
+
+# Se corta en una "}" seguida de salto de línea: dentro de un string JSON un
+# salto de línea va escapado, así que "}\n" solo aparece al cerrar el objeto y
+# una "}" dentro de la explicación no trunca el veredicto. Costo: si el modelo
+# sigue en la misma línea tras la "}", no se corta antes (lo acota max_new_tokens);
+# lo habitual es que cierre con EOS ahí mismo.
+STOP_SEQUENCES = ["}\n"]
+
+STRICT_JSON = (
+    'Responde ÚNICAMENTE con un objeto JSON válido. Sin texto adicional. '
+    'Claves: "verdict" (Correcta|Mejorable|Incorrecta), '
+    '"explanation" (breve), '
+    '"improved_answer" (una sola oración fiel al contexto).'
+)
+
+
+@lru_cache(maxsize=64)
+def prompt_prefix(system_prompt: str, context_text: str) -> str:
+    """Parte compartida del prompt, cacheada por (system_prompt, contexto)."""
+    return (
+        f"{system_prompt}\n\n{STRICT_JSON}\n\n"
+        f'Contexto:\n""" {context_text} """\n\n'
+    )
+
+
+def correction_prompt(system_prompt: str, context_text: str, question: str, user_answer: str) -> str:
+    """Prefijo compartido + cola con la pregunta y la respuesta del usuario."""
+    return prompt_prefix(system_prompt, context_text) + (
+        f"Pregunta: {question}\n"
+        f"Respuesta_del_usuario: {user_answer}\n"
+        "Evalúa y propone una versión mejorada."
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    return int(math.ceil(len(text or "") / WXA_CHARS_PER_TOKEN))
+
+
+class DecodeBudget:
+    """
+    Aprende cuántos tokens ocupa un veredicto JSON válido y propone
+    max_new_tokens = percentil * holgura, acotado a [min, max].
+    Lleva la cuenta de tokens generados frente a la línea base del límite fijo
+    (los reintentos cuentan como ahorro negativo) y del presupuesto pedido.
+    """
+
+    def __init__(self, default_max: int = WXA_MAX_NEW_TOKENS, min_tokens: int = WXA_MIN_NEW_TOKENS,
+                 percentile: float = WXA_TOKENS_PERCENTILE, headroom: float = WXA_TOKENS_HEADROOM,
+                 min_samples: int = WXA_TOKENS_MIN_SAMPLES, window: int = 500,
+                 adaptive: bool = WXA_ADAPTIVE_TOKENS):
+        self.default_max = default_max
+        self.min_tokens = min(min_tokens, default_max)
+        self.percentile = percentile
+        self.headroom = headroom
+        self.min_samples = max(1, min_samples)
+        self.adaptive = adaptive
+        self._sizes: Deque[int] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._retries = 0
+        self._generated = 0
+        self._baseline = 0
+        self._retry_tokens = 0
+        self._requested = 0
+
+    def max_new_tokens(self) -> int:
+        if not self.adaptive:
+            return self.default_max
+        with self._lock:
+            if len(self._sizes) < self.min_samples:
+                return self.default_max
+            data = sorted(self._sizes)
+        idx = min(len(data) - 1, int(round(self.percentile / 100.0 * (len(data) - 1))))
+        cap = int(math.ceil(data[idx] * self.headroom))
+        return max(self.min_tokens, min(self.default_max, cap))
+
+    def observe(self, generated_tokens: int, cap: int, valid: bool, retry_tokens: int = 0,
+                first_cap: int | None = None) -> Dict[str, int]:
+        """
+        Registra una corrección. `generated_tokens`/`cap` son los del intento final;
+        `retry_tokens`/`first_cap` los del primer intento descartado (si lo hubo).
+        Solo los veredictos válidos alimentan el percentil. Devuelve el detalle
+        por llamada (wx_tokens).
+        """
+        retried = first_cap is not None
+        baseline = generated_tokens
+        generated = generated_tokens + retry_tokens
+        requested = cap + (first_cap or 0)
+        with self._lock:
+            self._calls += 1
+            self._generated += generated
+            self._baseline += baseline
+            self._requested += requested
+            if retried:
+                self._retries += 1
+                self._retry_tokens += retry_tokens
+            if valid:
+                self._sizes.append(generated_tokens)
+        return {
+            "max_new_tokens": cap if not retried else first_cap,
+            "retried": retried,
+            "generated_tokens": generated,
+            "baseline_tokens": baseline,
+            "tokens_saved": baseline - generated,
+            "requested_tokens": requested,
+            "requested_saved": self.default_max - requested,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        cap = self.max_new_tokens()
+        with self._lock:
+            n = self._calls
+            saved = self._baseline - self._generated
+            requested_saved = self.default_max * n - self._requested
+            return {
+                "max_new_tokens": cap,
+                "calls": n,
+                "retries": self._retries,
+                "retry_tokens": self._retry_tokens,
+                "samples": len(self._sizes),
+                "generated_tokens_total": self._generated,
+                "baseline_tokens_total": self._baseline,
+                "avg_generated_tokens": (self._generated / n) if n else None,
+                "tokens_saved_total": saved,
+                "tokens_saved_avg": (saved / n) if n else None,
+                "requested_tokens_total": self._requested,
+                "requested_saved_total": requested_saved,
+            }
+
+
+DECODE_BUDGET = DecodeBudget()
@@ -0,0 +1,135 @@
+# services/response.py
+# Respuestas compactas para /api/evaluate:
+#   - Proyección de campos (fields=verdict,hap,faithfulness).
+#   - wx_raw (salida cruda del LLM, suele traer el prompt completo) se omite
+#     salvo que se pida debug.
+#   - Compresión gzip / brotli según Accept-Encoding.
+#   - Encoder JSON rápido (orjson) si está instalado.
+
+from __future__ import annotations
+import gzip
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from flask import Flask, Response, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except Exception:  # opcional
+    orjson = None
+
+try:
+    import brotli
+except Exception:  # opcional
+    brotli = None
+
+RESP_COMPRESS_MIN_BYTES = int(os.getenv("RESP_COMPRESS_MIN_BYTES") or "1024")
+RESP_GZIP_LEVEL         = int(os.getenv("RESP_GZIP_LEVEL") or "5")
+RESP_BROTLI_QUALITY     = int(os.getenv("RESP_BROTLI_QUALITY") or "5")
+RESP_RAW_MAX_CHARS      = int(os.getenv("RESP_RAW_MAX_CHARS") or "2000")
+
+# Alias cortos aceptados en `fields`
+FIELD_ALIASES = {
+    "verdict": "wx_verdict",
+    "explanation": "wx_explanation",
+    "improved_answer": "wx_improved_answer",
+    "raw": "wx_raw",
+}
+
+
+# -----------------------------
+# Proyección / modo compacto
+# -----------------------------
+def parse_fields(value: Any) -> Optional[List[str]]:
+    """Acepta 'a,b,c' o ['a', 'b']; devuelve None si no se pidió proyección."""
+    if value is None or value == "":
+        return None
+    items: Iterable[Any] = value.split(",") if isinstance(value, str) else value
+    out = []
+    for f in items:
+        f = str(f).strip()
+        if f:
+            out.append(FIELD_ALIASES.get(f, f))
+    return out or None
+
+
+def _truthy(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def response_options(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Lee fields/compact/debug del body o de la query string."""
+    fields = parse_fields(data.get("fields", request.args.get("fields")))
+    compact = _truthy(data.get("compact", request.args.get("compact"))) or fields is not None
+    debug = _truthy(data.get("debug", request.args.get("debug")))
+    return {"fields": fields, "compact": compact, "debug": debug}
+
+
+def compact_rows(rows: List[Dict[str, Any]], fields: Optional[List[str]] = None,
+                 debug: bool = False) -> List[Dict[str, Any]]:
+    """
+    Proyecta cada fila a `fields` (si se indicó). wx_raw se elimina salvo
+    debug; con debug se trunca a RESP_RAW_MAX_CHARS.
+    """
+    out = []
+    for row in rows:
+        r = {k: row.get(k) for k in fields} if fields else dict(row)
+        if "wx_raw" in r:
+            if not debug:
+                del r["wx_raw"]
+            elif isinstance(r["wx_raw"], str) and len(r["wx_raw"]) > RESP_RAW_MAX_CHARS:
+                r["wx_raw"] = r["wx_raw"][:RESP_RAW_MAX_CHARS] + "…"
+        out.append(r)
+    return out
+
+
+# -----------------------------
+# JSON rápido
+# -----------------------------
+class OrjsonProvider(DefaultJSONProvider):
+    """Serializa con orjson (mucho más rápido que json para listas de dicts)."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+# -----------------------------
+# Compresión
+# -----------------------------
+def _best_encoding() -> Optional[str]:
+    """Codificación aceptada con mayor q (respeta q=0 y "*"); br gana los empates."""
+    offered = (["br"] if brotli is not None else []) + ["gzip"]
+    return request.accept_encodings.best_match(offered)
+
+
+def compress_response(resp: Response) -> Response:
+    if (resp.direct_passthrough or resp.status_code < 200 or resp.status_code in (204, 304)
+            or "Content-Encoding" in resp.headers):
+        return resp
+    resp.vary.add("Accept-Encoding")
+    body = resp.get_data()
+    if len(body) < RESP_COMPRESS_MIN_BYTES:
+        return resp
+    encoding = _best_encoding()
+    if encoding == "br":
+        resp.set_data(brotli.compress(body, quality=RESP_BROTLI_QUALITY))
+        resp.headers["Content-Encoding"] = "br"
+    elif encoding == "gzip":
+        resp.set_data(gzip.compress(body, compresslevel=RESP_GZIP_LEVEL))
+        resp.headers["Content-Encoding"] = "gzip"
+    return resp
+
+
+def init_app(app: Flask) -> None:
+    """Activa el encoder rápido (si hay orjson) y la compresión de respuestas."""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    app.after_request(compress_response)
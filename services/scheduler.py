@@ -0,0 +1,193 @@
+# services/scheduler.py
+# Planificador con prioridades para TODAS las llamadas salientes
+# (watsonx.governance y watsonx.ai). Evita que una evaluación masiva
+# deje sin cupo a las llamadas interactivas del tablero.
+#
+# - Clases de prioridad con pesos (interactive > batch > background).
+# - Weighted Fair Queuing (WFQ) entre clases y, opcionalmente, entre tenants.
+# - La prioridad se fija por request (contextvar) y se mide la espera por clase.
+#
+# El planificador es POR PROCESO: cada worker de gunicorn tiene el suyo y
+# reordena solo los requests de sus hilos (gunicorn.conf.py fija `threads`).
+# La concurrencia total hacia upstream es workers * GOV_SCHED_SLOTS; para
+# respetar una cuota compartida, fijar GOV_SCHED_SLOTS = cuota / workers.
+
+from __future__ import annotations
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+GOV_SCHED_SLOTS      = int(os.getenv("GOV_SCHED_SLOTS") or "4")
+GOV_SCHED_PER_TENANT = (os.getenv("GOV_SCHED_PER_TENANT") or "0").strip() == "1"
+
+PRIORITY_WEIGHTS: Dict[str, float] = {
+    "interactive": 8.0,
+    "batch": 2.0,
+    "background": 1.0,
+}
+DEFAULT_PRIORITY = "batch"
+_PRUNE_MIN = 64  # flujos antes de intentar olvidar los inactivos
+
+_priority: contextvars.ContextVar[str] = contextvars.ContextVar("gov_priority", default=DEFAULT_PRIORITY)
+_tenant: contextvars.ContextVar[str] = contextvars.ContextVar("gov_tenant", default="")
+
+
+def normalize_priority(value: Optional[str], default: str = DEFAULT_PRIORITY) -> str:
+    v = (value or "").strip().lower()
+    return v if v in PRIORITY_WEIGHTS else default
+
+
+@contextmanager
+def request_priority(priority: Optional[str] = None, tenant: Optional[str] = None) -> Iterator[None]:
+    """Fija la prioridad (y el tenant) para las llamadas salientes dentro del bloque."""
+    t1 = _priority.set(normalize_priority(priority))
+    t2 = _tenant.set(tenant or "")
+    try:
+        yield
+    finally:
+        _priority.reset(t1)
+        _tenant.reset(t2)
+
+
+def set_request_priority(priority: Optional[str] = None, tenant: Optional[str] = None) -> None:
+    """Variante sin context manager (p. ej. en before_request de Flask)."""
+    _priority.set(normalize_priority(priority))
+    _tenant.set(tenant or "")
+
+
+def current_priority() -> Tuple[str, str]:
+    return _priority.get(), _tenant.get()
+
+
+class _Waiter:
+    __slots__ = ("tag", "seq", "cls", "flow", "event")
+
+    def __init__(self, tag: float, seq: int, cls: str, flow: Tuple[str, str]):
+        self.tag = tag
+        self.seq = seq
+        self.cls = cls
+        self.flow = flow
+        self.event = threading.Event()
+
+
+class FairScheduler:
+    """
+    Semáforo con WFQ: hay `slots` llamadas concurrentes como máximo; cuando se
+    libera un slot, entra el que tenga menor etiqueta de fin virtual.
+    Cada flujo (clase, o clase+tenant) avanza su etiqueta en 1/peso por llamada.
+    Un flujo cuya etiqueta ya quedó atrás del tiempo virtual y no tiene llamadas
+    en cola se olvida: volvería a empezar en el tiempo virtual igual. Así los
+    tenants (X-Tenant-Id, elegido por el cliente) no acumulan memoria.
+    """
+
+    def __init__(self, slots: int = GOV_SCHED_SLOTS, per_tenant: bool = GOV_SCHED_PER_TENANT,
+                 weights: Optional[Dict[str, float]] = None):
+        self.slots = max(1, slots)
+        self.per_tenant = per_tenant
+        self.weights = dict(weights or PRIORITY_WEIGHTS)
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._seq = 0
+        self._vtime = 0.0
+        self._finish: Dict[Tuple[str, str], float] = {}
+        self._prune_at = _PRUNE_MIN
+        self._queue: List[_Waiter] = []
+        self._waits: Dict[str, Deque[float]] = {c: deque(maxlen=500) for c in self.weights}
+        self._counts: Dict[str, int] = {c: 0 for c in self.weights}
+
+    def _acquire(self, cls: str, tenant: str) -> float:
+        t0 = time.monotonic()
+        with self._lock:
+            flow = (cls, tenant if self.per_tenant else "")
+            start = max(self._vtime, self._finish.get(flow, 0.0))
+            tag = start + 1.0 / self.weights.get(cls, 1.0)
+            self._finish[flow] = tag
+            if self._busy < self.slots and not self._queue:
+                self._busy += 1
+                # Sin cola no hay deuda entre flujos: el tiempo virtual avanza hasta
+                # la etiqueta de la llamada servida (como en _release)
+                self._vtime = max(self._vtime, tag)
+                waiter = None
+            else:
+                self._seq += 1
+                waiter = _Waiter(tag, self._seq, cls, flow)
+                self._queue.append(waiter)
+            if len(self._finish) > self._prune_at:
+                self._prune_locked()
+        if waiter is not None:
+            waiter.event.wait()
+        waited = time.monotonic() - t0
+        with self._lock:
+            self._waits.setdefault(cls, deque(maxlen=500)).append(waited)
+            self._counts[cls] = self._counts.get(cls, 0) + 1
+        return waited
+
+    def _release(self) -> None:
+        with self._lock:
+            if not self._queue:
+                self._busy -= 1
+                return
+            nxt = min(self._queue, key=lambda w: (w.tag, w.seq))
+            self._queue.remove(nxt)
+            self._vtime = max(self._vtime, nxt.tag)
+            # El slot pasa directamente al siguiente (_busy no cambia)
+            nxt.event.set()
+
+    def _prune_locked(self) -> None:
+        """Olvida los flujos sin deuda (etiqueta <= tiempo virtual) ni llamadas en cola."""
+        waiting = {w.flow for w in self._queue}
+        self._finish = {f: t for f, t in self._finish.items() if t > self._vtime or f in waiting}
+        # Umbral que crece con los flujos vivos: costo amortizado O(1) por llamada
+        self._prune_at = max(_PRUNE_MIN, 2 * len(self._finish))
+
+    @contextmanager
+    def slot(self, priority: Optional[str] = None, tenant: Optional[str] = None) -> Iterator[float]:
+        cur_p, cur_t = current_priority()
+        cls = normalize_priority(priority or cur_p)
+        waited = self._acquire(cls, tenant if tenant is not None else cur_t)
+        try:
+            yield waited
+        finally:
+            self._release()
+
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self.slot():
+            return fn(*args, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = {"slots": self.slots, "busy": self._busy, "queued": len(self._queue), "classes": {}}
+            for cls, waits in self._waits.items():
+                data = sorted(waits)
+                n = len(data)
+                out["classes"][cls] = {
+                    "calls": self._counts.get(cls, 0),
+                    "queued": sum(1 for w in self._queue if w.cls == cls),
+                    "wait_p50_ms": round(data[n // 2] * 1000, 1) if n else 0.0,
+                    "wait_p95_ms": round(data[min(n - 1, int(0.95 * n))] * 1000, 1) if n else 0.0,
+                    "wait_max_ms": round(data[-1] * 1000, 1) if n else 0.0,
+                }
+            return out
+
+
+_SCHEDULER: FairScheduler | None = None
+_SCHEDULER_LOCK = threading.Lock()
+
+
+def get_scheduler() -> FairScheduler:
+    """Instancia compartida por proceso (cada worker de gunicorn tiene la suya)."""
+    global _SCHEDULER
+    if _SCHEDULER is None:
+        with _SCHEDULER_LOCK:
+            if _SCHEDULER is None:
+                _SCHEDULER = FairScheduler()
+    return _SCHEDULER
+
+
+def scheduled(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Ejecuta una llamada saliente pasando por el planificador con la prioridad actual."""
+    return get_scheduler().run(fn, *args, **kwargs)
@@ -5,12 +5,22 @@ import json
 import time
 from typing import Optional, Tuple
 
+from services.hedging import hedged_call
+from services.prompt_template import DECODE_BUDGET, STOP_SEQUENCES, correction_prompt, estimate_tokens
+
 WXA_URL         = (os.getenv("WXA_URL") or "").strip().rstrip("/")
 WXA_PROJECT_ID  = (os.getenv("WXA_PROJECT_ID") or os.getenv("WXA_PROJECTID") or "").strip()
 WXA_MODEL       = (os.getenv("WXA_MODEL") or "ibm/granite-3-8b-instruct").strip()
 WXG_APIKEY      = (os.getenv("WATSONX_APIKEY") or os.getenv("WATSONX_API_KEY") or "").strip()
 WXA_DELAY_MS    = int(os.getenv("WXA_DELAY_MS") or "600")
 
+BASE_PARAMS = {
+    "decoding_method": "greedy",
+    "max_new_tokens": DECODE_BUDGET.default_max,
+    "temperature": 0.0,
+    "return_options": {"input_text": True},
+}
+
 def build_wxa_model() -> Tuple[Optional[object], Optional[str]]:
     """
     Devuelve (model, error). Si hay error, model=None y error contiene el motivo.
@@ -28,35 +38,66 @@ def build_wxa_model() -> Tuple[Optional[object], Optional[str]]:
             model_id=WXA_MODEL,
             credentials=creds,
             project_id=WXA_PROJECT_ID,
-            params={
-                "decoding_method": "greedy",
-                "max_new_tokens": 250,
-                "temperature": 0.0,
-                "return_options": {"input_text": True},
-            },
+            params=dict(BASE_PARAMS),
         )
         return model, None
     except Exception as e:
         return None, f"Error creando modelo watsonx.ai: {e}"
 
+_JSON_DECODER = json.JSONDecoder()
+
 def _extract_last_valid_json(text: str):
+    # raw_decode desde cada "{": respeta "}" dentro de strings (a diferencia de un regex)
     clean = re.sub(r"^```(?:json)?\s*|\s*```$", "", str(text).strip(), flags=re.I | re.M)
     last = None
-    for m in re.findall(r"\{[\s\S]*?\}", clean):
+    pos = clean.find("{")
+    while pos != -1:
         try:
-            cand = json.loads(m)
+            cand, end = _JSON_DECODER.raw_decode(clean, pos)
             if isinstance(cand, dict) and {
                 "verdict", "explanation", "improved_answer"
             } <= set(cand.keys()):
                 last = cand
-        except Exception:
-            continue
+                pos = clean.find("{", end)
+                continue
+        except ValueError:
+            pass
+        pos = clean.find("{", pos + 1)
     return last
 
+def _generate(model, prompt: str, max_new_tokens: int) -> Tuple[str, int, bool]:
+    """
+    Llama a generate_text con el límite indicado y stop en el cierre del JSON.
+    Devuelve (texto, tokens generados, truncado); si el SDK no informa tokens, se
+    estiman. truncado=True si la generación se cortó por max_new_tokens.
+    """
+    params = dict(BASE_PARAMS, max_new_tokens=max_new_tokens,
+                  stop_sequences=STOP_SEQUENCES, include_stop_sequence=True)
+    # Greedy + temperature 0: los duplicados son idénticos, se puede hacer hedging
+    # hedged_call toma un slot del planificador por intento (primario y duplicado)
+    resp = hedged_call(model.generate_text, prompt=prompt, params=params, raw_response=True)
+    try:
+        res = resp["results"][0]
+        text = str(res.get("generated_text") or "")
+        tokens = res.get("generated_token_count")
+        tokens = int(tokens) if tokens is not None else estimate_tokens(text)
+        stop_reason = res.get("stop_reason")
+        truncated = stop_reason == "max_tokens" if stop_reason else tokens >= max_new_tokens
+        return text, tokens, truncated
+    except (TypeError, KeyError, IndexError, AttributeError):
+        text = str(resp)
+        return text, estimate_tokens(text), False
+
+def generation_stats() -> dict:
+    """Tokens pedidos/generados y ahorro (neto de reintentos) del límite adaptativo."""
+    return DECODE_BUDGET.stats()
+
 def correct_answer(model, question: str, user_answer: str, context_text: str, system_prompt: str) -> dict:
     """
     Devuelve dict con:
     wx_verdict, wx_explanation, wx_improved_answer, wx_raw
+    y wx_tokens (límite pedido, tokens generados y ahorro frente al límite fijo)
+    cuando hubo llamada a watsonx.ai.
     """
     if model is None:
         return {
@@ -66,36 +107,37 @@ def correct_answer(model, question: str, user_answer: str, context_text: str, sy
             "wx_raw": "watsonx.ai no disponible",
         }
 
-    strict = (
-        'Responde ÚNICAMENTE con un objeto JSON válido. Sin texto adicional. '
-        'Claves: "verdict" (Correcta|Mejorable|Incorrecta), '
-        '"explanation" (breve), '
-        '"improved_answer" (una sola oración fiel al contexto).'
-    )
-
-    prompt = (
-        f"{system_prompt}\n\n{strict}\n\n"
-        f'Contexto:\n""" {context_text} """\n\n'
-        f"Pregunta: {question}\n"
-        f"Respuesta_del_usuario: {user_answer}\n"
-        "Evalúa y propone una versión mejorada."
-    )
+    # Prefijo compartido (system prompt + instrucciones + contexto) + cola por pregunta
+    prompt = correction_prompt(system_prompt, context_text, question, user_answer)
 
     try:
-        raw = model.generate_text(prompt=prompt)
+        cap = DECODE_BUDGET.max_new_tokens()
+        raw, tokens, truncated = _generate(model, prompt, cap)
         data = _extract_last_valid_json(raw)
+        first_cap, retry_tokens = None, 0
+        if not isinstance(data, dict) and truncated and cap < DECODE_BUDGET.default_max:
+            # Cortado por el límite adaptativo: reintento con el máximo (los tokens
+            # del primer intento se pierden y cuentan como costo). Una negativa o un
+            # JSON mal formado que terminó solo no se reintenta: saldría igual.
+            first_cap, retry_tokens = cap, tokens
+            cap = DECODE_BUDGET.default_max
+            raw, tokens, _ = _generate(model, prompt, cap)
+            data = _extract_last_valid_json(raw)
+        wx_tokens = DECODE_BUDGET.observe(tokens, cap, isinstance(data, dict), retry_tokens, first_cap)
         if not isinstance(data, dict):
             return {
                 "wx_verdict": None,
                 "wx_explanation": None,
                 "wx_improved_answer": None,
                 "wx_raw": str(raw),
+                "wx_tokens": wx_tokens,
             }
         return {
             "wx_verdict": data.get("verdict"),
             "wx_explanation": data.get("explanation"),
             "wx_improved_answer": data.get("improved_answer"),
             "wx_raw": str(raw),
+            "wx_tokens": wx_tokens,
         }
     except Exception as e:
         return {